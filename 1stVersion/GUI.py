@@ -6,6 +6,7 @@ from src.core.board import Board, Move, square_to_algebraic
 from src.utils.utils import algebraic_to_square
 import random
 from src.Ai.minimax import find_best_move
+from src.Ai.ponder import Ponderer
 from src.ml.predict_move import MovePredictor
 from src.ml.rl_agent import RLAgent
 
@@ -87,6 +88,7 @@ class GUI:
         self.promotion_pieces = ['Q', 'R', 'B', 'N']
         self.promotion_rects = []
         self.ai_vs_ai = False
+        self.ponder = True  # search on the player's time
         self.rl_agent = RLAgent()
 
     def draw_board(self):
@@ -96,8 +98,7 @@ class GUI:
                 pygame.draw.rect(SCREEN, color, (col * SQUARE_SIZE, row * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE))
 
     def draw_pieces(self):
-        for square in range(64):
-            piece = self.board.get_piece_at_square(square)
+        for square, piece in enumerate(self.board.mailbox):
             if piece:
                 row = 7 - (square // 8)
                 col = square % 8
@@ -157,8 +158,12 @@ class GUI:
                             for i, rect in enumerate(self.promotion_rects):
                                 if rect.collidepoint(pos):
                                     promoted_piece = self.promotion_pieces[i]
-                                    self.promotion_move.promoted_piece = promoted_piece
-                                    self.board.make_move(self.promotion_move)
+                                    pawn_move = self.promotion_move
+                                    self.board.make_move(Move(
+                                        pawn_move.piece, pawn_move.from_square, pawn_move.to_square,
+                                        captured_piece=pawn_move.captured_piece,
+                                        promoted_piece=promoted_piece
+                                    ))
                                     print(f"Promotion chosen: {promoted_piece}")
                                     self.promotion_move = None
                                     break
@@ -171,7 +176,7 @@ class GUI:
                                     piece = self.board.get_piece_at_square(square)
                                     if piece and piece.isupper():
                                         self.selected_square = square
-                                        self.valid_moves = [move.to_square for move in self.board.generate_legal_moves() if move.from_square == square]
+                                        self.valid_moves = [move.to_square for move in self.board.legal_moves() if move.from_square == square]
                                         print(f"Selected square: {square_to_algebraic(square)} with piece {piece}")
                                 else:
                                     if square == self.selected_square:
@@ -179,7 +184,7 @@ class GUI:
                                         self.selected_square = None
                                         self.valid_moves = []
                                     elif square in self.valid_moves:
-                                        legal_moves = self.board.generate_legal_moves()
+                                        legal_moves = self.board.legal_moves()
                                         move_found = False
                                         for legal_move in legal_moves:
                                             if legal_move.from_square == self.selected_square and legal_move.to_square == square:
@@ -202,7 +207,7 @@ class GUI:
                                         piece = self.board.get_piece_at_square(square)
                                         if piece and piece.isupper():
                                             self.selected_square = square
-                                            self.valid_moves = [move.to_square for move in self.board.generate_legal_moves() if move.from_square == square]
+                                            self.valid_moves = [move.to_square for move in self.board.legal_moves() if move.from_square == square]
                                             print(f"Changed selection to square: {square_to_algebraic(square)} with piece {piece}")
                                         else:
                                             print(f"Clicked on invalid square: {square_to_algebraic(square)}")
@@ -213,7 +218,7 @@ class GUI:
                 # AI vs AI mode
                 if self.ai_vs_ai and self.running:
                     if not self.board.is_game_over():
-                        legal_moves = self.board.generate_legal_moves()
+                        legal_moves = self.board.legal_moves()
                         if legal_moves:
                             action = self.rl_agent.select_action(self.board, legal_moves)
                             self.board.make_move(action)
@@ -234,7 +239,8 @@ class GUI:
                     ai_move = engine.get_ai_move(self.board)
                     if ai_move:
                         print(f"AI suggests: {ai_move}")
-                        move_obj = self.parse_move(ai_move)
+                        # A ponder hit returns the Move itself, which keeps its castling flag
+                        move_obj = ai_move if isinstance(ai_move, Move) else self.parse_move(ai_move)
                         if move_obj and move_obj in self.board.generate_legal_moves():
                             self.board.make_move(move_obj)
                             print(f"AI plays: {ai_move}")
@@ -247,12 +253,15 @@ class GUI:
                                 print(f"Minimax selects: {best_move}")
                             else:
                                 print("Minimax found no legal moves.")
+                        if self.ponder and not self.board.is_game_over():
+                            engine.start_pondering(self.board)
                     else:
                         print("AI has no legal moves.")
 
                 pygame.display.flip()
                 clock.tick(60)
             else:
+                engine.stop_pondering()
                 self.draw_board()
                 self.draw_pieces()
                 self.display_game_over()
@@ -419,6 +428,13 @@ class ChessEngine:
         self.move_predictor = MovePredictor()
         self.games_played = 0
         self.moves_learned = 0
+        self.ponderer = Ponderer(max_depth=6, time_limit=5.0)
+
+    def start_pondering(self, board):
+        self.ponderer.start(board)
+
+    def stop_pondering(self):
+        self.ponderer.stop()
 
     def learn_from_user_move(self, board, move):
         self.moves_learned += 1
@@ -430,7 +446,12 @@ class ChessEngine:
     def get_ai_move(self, board: Board):
         self.games_played += 1
         print(f"\nAI thinking (Game {self.games_played})...")
-        
+
+        ponder_move = self.ponderer.finish(board)
+        if ponder_move:
+            print(f"Ponder hit, Minimax selects: {ponder_move}")
+            return ponder_move
+
         move = board.suggest_move()
         if move and move in board.generate_legal_moves():
             print(f"MovePredictor suggests: {move}")
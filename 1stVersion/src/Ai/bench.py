@@ -0,0 +1,203 @@
+"""
+Search benchmark: runs a fixed-depth search on a fixed position set under
+several search configurations and reports the nodes searched per
+iteration, relative to plain alpha-beta.
+
+    python -m src.Ai.bench --depth 4
+
+With --tactics it instead searches a set of tactical positions (the first
+ten of Win At Chess) to the given depth and counts how many best moves
+each configuration finds, so pruning can be checked for lost tactics.
+
+    python -m src.Ai.bench --tactics --depth 4
+
+With --smp it instead measures Lazy SMP scaling: the time each worker
+count needs to complete every depth within a fixed time limit. --split
+measures root splitting the same way.
+
+    python -m src.Ai.bench --smp 1,2,4 --time 10 [--split]
+"""
+
+import argparse
+import time
+
+from src.Ai import minimax
+from src.Ai.evaluation import eval_cache
+from src.Ai.parallel import find_best_move_smp, find_best_move_split, shutdown_root_pool
+from src.core.board import Board
+from src.core.perft import PERFT_SUITE
+
+BENCH_POSITIONS = [(name, fen) for name, fen, _ in PERFT_SUITE]
+
+# (name, FEN, best move in UCI)
+TACTICAL_SUITE = [
+    ('WAC.001', '2rr3k/pp3pp1/1nnqbN1p/3pN3/2pP4/2P3Q1/PPB4P/R4RK1 w - - 0 1', 'g3g6'),
+    ('WAC.002', '8/7p/5k2/5p2/p1p2P2/Pr1pPK2/1P1R3P/8 b - - 0 1', 'b3b2'),
+    ('WAC.003', '5rk1/1ppb3p/p1pb4/6q1/3P1p1r/2P1R2P/PP1BQ1P1/5RKN w - - 0 1', 'e3g3'),
+    ('WAC.004', 'r1bq2rk/pp3pbp/2p1p1pQ/7P/3P4/2PB1N2/PP3PPR/2KR4 w - - 0 1', 'h6h7'),
+    ('WAC.005', '5k2/6pp/p1qN4/1p1p4/3P4/2PKP2Q/PP3r2/3R4 b - - 0 1', 'c6c4'),
+    ('WAC.006', '7k/p7/1R5K/6r1/6p1/6P1/8/8 w - - 0 1', 'b6b7'),
+    ('WAC.007', 'rnbqkb1r/pppp1ppp/8/4P3/6n1/7P/PPPNPPP1/R1BQKBNR b KQkq - 0 1', 'g4e3'),
+    ('WAC.008', 'r4q1k/p2bR1rp/2p2Q1N/5p2/5p2/2P5/PP3PPP/R5K1 w - - 0 1', 'e7f7'),
+    ('WAC.009', '3q1rk1/p4pp1/2pb3p/3p4/6Pr/1PNQ4/P1PB1PP1/4RRK1 b - - 0 1', 'd6h2'),
+    ('WAC.010', '2br2k1/2q3rn/p2NppQ1/2p1P3/Pp5R/4P3/1P3PPP/3R2K1 w - - 0 1', 'h4h7'),
+]
+
+SEARCH_FLAGS = [
+    'USE_PVS', 'USE_ASPIRATION', 'USE_NULL_MOVE', 'USE_LMR',
+    'USE_FUTILITY', 'USE_REVERSE_FUTILITY', 'USE_RAZORING',
+    'USE_DELTA_PRUNING', 'USE_SEE_PRUNING',
+]
+
+# name -> minimax flags switched on; every other search flag is off
+BENCH_CONFIGS = {
+    'alpha-beta': [],
+    'pvs': ['USE_PVS'],
+    'pvs+aspiration': ['USE_PVS', 'USE_ASPIRATION'],
+    'null-move': ['USE_PVS', 'USE_ASPIRATION', 'USE_NULL_MOVE'],
+    'null-move+lmr': ['USE_PVS', 'USE_ASPIRATION', 'USE_NULL_MOVE', 'USE_LMR'],
+    'frontier': SEARCH_FLAGS[:7],
+    'quiescence-pruning': SEARCH_FLAGS,
+}
+
+
+def bench_position(fen, depth, enabled_flags):
+    """
+    Searches one position from an empty transposition table and returns
+    (nodes per iteration, seconds, best move).
+    """
+    saved = {name: getattr(minimax, name) for name in SEARCH_FLAGS}
+    for name in SEARCH_FLAGS:
+        setattr(minimax, name, name in enabled_flags)
+    try:
+        minimax.transposition_table.clear()
+        eval_cache.clear()
+        board = Board.from_fen(fen)
+        start = time.perf_counter()
+        move = minimax.find_best_move(board, depth, time_limit=float('inf'), verbose=False)
+        elapsed = time.perf_counter() - start
+    finally:
+        for name, value in saved.items():
+            setattr(minimax, name, value)
+    cumulative = minimax.iteration_nodes
+    return [nodes - previous for nodes, previous in zip(cumulative, [0] + cumulative[:-1])], elapsed, move
+
+
+def run_bench(depth, configs=None):
+    """
+    Prints a per-depth node table for every configuration and returns
+    {config name: [total nodes per depth]}.
+    """
+    configs = configs or list(BENCH_CONFIGS)
+    totals = {}
+    for config in configs:
+        depth_totals = [0] * depth
+        pruned = dict.fromkeys(minimax.pruning_counts, 0)
+        cutoffs = dict.fromkeys(minimax.cutoff_counts, 0)
+        elapsed = 0.0
+        for name, fen in BENCH_POSITIONS:
+            nodes, seconds, _ = bench_position(fen, depth, BENCH_CONFIGS[config])
+            elapsed += seconds
+            for index, count in enumerate(nodes):
+                depth_totals[index] += count
+            for technique, count in minimax.pruning_counts.items():
+                pruned[technique] += count
+            for kind, count in minimax.cutoff_counts.items():
+                cutoffs[kind] += count
+        totals[config] = depth_totals
+        pruned_text = ', '.join(f"{technique} {count}" for technique, count in pruned.items() if count)
+        first_move_rate = cutoffs['first_move'] / cutoffs['cutoffs'] if cutoffs['cutoffs'] else 0
+        print(f"{config}: {sum(depth_totals)} nodes in {elapsed:.2f}s, first-move cutoffs {first_move_rate:.1%}"
+              + (f" (pruned: {pruned_text})" if pruned_text else ''))
+
+    baseline = totals[configs[0]]
+    print(f"{'depth':>5} " + ' '.join(f"{config:>22}" for config in configs))
+    for index in range(depth):
+        row = []
+        for config in configs:
+            nodes = totals[config][index]
+            ratio = nodes / baseline[index] if baseline[index] else 0
+            row.append(f"{nodes:>12} ({ratio:6.1%})")
+        print(f"{index + 1:>5} " + ' '.join(f"{cell:>22}" for cell in row))
+    return totals
+
+
+def run_tactics(depth, configs=None):
+    """
+    Prints the tactical suite positions each configuration solves at depth
+    and returns {config name: number solved}.
+    """
+    configs = configs or list(BENCH_CONFIGS)
+    solved = {}
+    for config in configs:
+        missed = []
+        elapsed = 0.0
+        for name, fen, best in TACTICAL_SUITE:
+            _, seconds, move = bench_position(fen, depth, BENCH_CONFIGS[config])
+            elapsed += seconds
+            if move is None or move.uci() != best:
+                missed.append(f"{name} {move.uci() if move else '-'} (expected {best})")
+        solved[config] = len(TACTICAL_SUITE) - len(missed)
+        print(f"{config}: {solved[config]}/{len(TACTICAL_SUITE)} solved in {elapsed:.2f}s"
+              + (f", missed {', '.join(missed)}" if missed else ''))
+    return solved
+
+
+def bench_smp(thread_counts, time_limit, max_depth=64, split=False):
+    """
+    Prints the average time to complete each depth for every worker count
+    and returns {threads: {depth: average seconds}}. Depths not reached on
+    every position are averaged over the positions that reached them. With
+    split, root splitting is measured instead of Lazy SMP.
+    """
+    results = {}
+    for threads in thread_counts:
+        reached = {}
+        for name, fen in BENCH_POSITIONS:
+            board = Board.from_fen(fen)
+            start = time.perf_counter()
+
+            def record(depth, score, move, nodes):
+                reached.setdefault(depth, []).append(time.perf_counter() - start)
+
+            if split:
+                find_best_move_split(board, max_depth, time_limit, workers=threads, verbose=False,
+                                     iteration_callback=record)
+            else:
+                find_best_move_smp(board, max_depth, time_limit, threads=threads, verbose=False,
+                                   iteration_callback=record)
+        if split:
+            shutdown_root_pool()
+        results[threads] = {depth: sum(times) / len(times) for depth, times in sorted(reached.items())}
+        deepest = max(results[threads], default=0)
+        print(f"{threads} workers: deepest depth {deepest}")
+
+    depths = sorted({depth for times in results.values() for depth in times})
+    print(f"{'depth':>5} " + ' '.join(f"{str(threads) + ' workers':>12}" for threads in thread_counts))
+    for depth in depths:
+        cells = [f"{results[threads][depth]:.2f}s" if depth in results[threads] else '-'
+                 for threads in thread_counts]
+        print(f"{depth:>5} " + ' '.join(f"{cell:>12}" for cell in cells))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Search node benchmark')
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--config', action='append', choices=list(BENCH_CONFIGS),
+                        help='configuration to run (repeatable); the first is the baseline')
+    parser.add_argument('--tactics', action='store_true', help='count solved tactical suite positions')
+    parser.add_argument('--smp', help='comma-separated worker counts for the Lazy SMP scaling run')
+    parser.add_argument('--time', type=float, default=10.0, help='time limit per position for --smp')
+    parser.add_argument('--split', action='store_true', help='measure root splitting instead of Lazy SMP')
+    args = parser.parse_args()
+    if args.smp:
+        bench_smp([int(threads) for threads in args.smp.split(',')], args.time, split=args.split)
+    elif args.tactics:
+        run_tactics(args.depth, args.config)
+    else:
+        run_bench(args.depth, args.config)
+
+
+if __name__ == '__main__':
+    main()
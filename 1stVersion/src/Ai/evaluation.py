@@ -1,5 +1,4 @@
 import numpy as np
-from functools import lru_cache
 from src.core.constants import PIECE_VALUES, POSITIONAL_VALUES, FILE_MASKS
 
 
@@ -66,8 +65,44 @@ PIECE_SQUARE_TABLES = {
     ]),
 }
 
-@lru_cache(maxsize=None)
+# Number of evaluation cache slots, a power of two
+EVAL_CACHE_SIZE = 1 << 18
+
+
+class EvalCache:
+    """
+    Fixed-size evaluation cache. Like the transposition table it is indexed
+    by the low bits of the Zobrist hash, and a new entry simply replaces
+    the one in its slot, so the cache never has to be emptied.
+    """
+
+    def __init__(self, size=EVAL_CACHE_SIZE):
+        self.mask = size - 1
+        self.keys = [None] * size
+        self.scores = [0] * size
+
+    def clear(self):
+        size = self.mask + 1
+        self.keys = [None] * size
+        self.scores = [0] * size
+
+
+eval_cache = EvalCache()
+
 def evaluate(board):
+    """
+    Returns compute_evaluation(board), cached by Zobrist hash in eval_cache.
+    """
+    key = board.zobrist_hash
+    index = key & eval_cache.mask
+    if eval_cache.keys[index] == key:
+        return eval_cache.scores[index]
+    score = compute_evaluation(board)
+    eval_cache.keys[index] = key
+    eval_cache.scores[index] = score
+    return score
+
+def compute_evaluation(board):
     """
     Evaluates the board state and returns a score from the perspective of the player to move.
     Positive scores favor White, negative scores favor Black.
@@ -106,9 +141,11 @@ def evaluate(board):
             squares = board.get_squares_from_bitboard(bitboard)
             material_score += piece_value * len(squares)
 
-            # Positional score using piece-square tables
+            # Positional score using piece-square tables (flipped for black)
             if piece.upper() in PIECE_SQUARE_TABLES:
                 table = PIECE_SQUARE_TABLES[piece.upper()]
+                if piece.islower():
+                    table = table[::-1]
                 positional_score += np.sum(table[squares])
 
             # Mobility
@@ -116,7 +153,7 @@ def evaluate(board):
             mobility_score += own_mobility
 
             # Space
-            space_score += evaluate_space(piece, squares, own=True)
+            space_score += evaluate_space(piece, squares)
 
             # Count bishops for bishop pair
             if piece.upper() == 'B':
@@ -141,9 +178,11 @@ def evaluate(board):
             squares = board.get_squares_from_bitboard(bitboard)
             material_score -= piece_value * len(squares)
 
-            # Positional score using piece-square tables (flipped for opponent)
+            # Positional score using piece-square tables (flipped for black)
             if piece.upper() in PIECE_SQUARE_TABLES:
-                table = PIECE_SQUARE_TABLES[piece.upper()][::-1]
+                table = PIECE_SQUARE_TABLES[piece.upper()]
+                if piece.islower():
+                    table = table[::-1]
                 positional_score -= np.sum(table[squares])
 
             # Mobility
@@ -151,7 +190,7 @@ def evaluate(board):
             mobility_score -= enemy_mobility
 
             # Space
-            space_score -= evaluate_space(piece, squares, own=False)
+            space_score -= evaluate_space(piece, squares)
             if piece.upper() == 'B':
                 enemy_bishops += len(squares)
 
@@ -169,11 +208,14 @@ def evaluate(board):
     if enemy_bishops >= 2:
         bishop_pair_score -= 50
 
+    # The pawn terms are from White's point of view, the rest from the side
+    # to move's
+    side = 1 if board.white_to_move else -1
     king_safety_score = evaluate_king_safety(board)
-    pawn_structure_score = evaluate_pawn_structure(board)
+    pawn_structure_score = side * evaluate_pawn_structure(board)
     center_control_score = evaluate_center_control(board)
     piece_coordination_score = evaluate_piece_coordination(board)
-    passed_pawn_score = evaluate_passed_pawns(board)
+    passed_pawn_score = side * evaluate_passed_pawns(board)
     threats_score = evaluate_threats(board)
     opponent_weaknesses_score = evaluate_opponent_weaknesses(board)
     exchange_score = evaluate_exchanges(board)
@@ -199,7 +241,10 @@ def evaluate(board):
 
     if phase == 'endgame':
         endgame_score = evaluate_endgame(board)
-        score += endgame_score
+        if material_score > 0:
+            score += endgame_score
+        elif material_score < 0:
+            score -= endgame_score
     if not board.white_to_move:
         score = -score
 
@@ -231,38 +276,46 @@ def evaluate_mobility(board, piece, squares):
         mobility += len(moves)
     return mobility
 
-def evaluate_space(piece, squares, own=True):
+def evaluate_space(piece, squares):
     """
     Evaluates space control based on piece positions.
     """
-    score = 0
     ranks = np.array(squares) // 8
-    if own:
-        if piece.isupper():
-            score += np.sum(ranks >= 4) * 5
-        else:
-            score += np.sum(ranks <= 3) * 5
-    else:
-        if piece.isupper():
-            score -= np.sum(ranks >= 4) * 5
-        else:
-            score -= np.sum(ranks <= 3) * 5
-    return score
+    if piece.isupper():
+        return np.sum(ranks >= 4) * 5
+    return np.sum(ranks <= 3) * 5
 
 def evaluate_king_safety(board):
     """
-    Evaluates the safety of the king based on surrounding pieces and enemy threats.
+    Evaluates the safety of both kings based on surrounding pieces and
+    enemy threats, from the side to move's point of view.
     """
-    score = 0
-    own_king_square = board.find_king_square(board.white_to_move)
-    if own_king_square is None:
+    own_safety = evaluate_king_safety_for_color(board, board.white_to_move)
+    enemy_safety = evaluate_king_safety_for_color(board, not board.white_to_move)
+    if own_safety is None:
         return -100000 if board.white_to_move else 100000
+    if enemy_safety is None:
+        return own_safety
+    return own_safety - enemy_safety
 
-    enemy_moves = board.generate_legal_moves(simulate=False, own=False)
-    attack_zones = get_king_attack_zones(own_king_square)
-    attack_score = sum(get_piece_attack_weight(move.piece) for move in enemy_moves if move.to_square in attack_zones)
-    shield_penalty = evaluate_king_pawn_shield(board, own_king_square, board.white_to_move)
-    open_file_penalty = evaluate_open_files_to_king(board, own_king_square, board.white_to_move)
+def evaluate_king_safety_for_color(board, is_white):
+    """
+    King safety of one colour, or None if its king is missing.
+    """
+    score = 0
+    king_square = board.find_king_square(is_white)
+    if king_square is None:
+        return None
+
+    attack_score = 0
+    for square in get_king_attack_zones(king_square):
+        attackers = board.attackers_to(square, not is_white)
+        while attackers:
+            attacker_square = (attackers & -attackers).bit_length() - 1
+            attack_score += get_piece_attack_weight(board.mailbox[attacker_square])
+            attackers &= attackers - 1
+    shield_penalty = evaluate_king_pawn_shield(board, king_square, is_white)
+    open_file_penalty = evaluate_open_files_to_king(board, king_square, is_white)
 
     score -= attack_score * 10
     score -= shield_penalty
@@ -362,10 +415,17 @@ def evaluate_center_control(board):
     """
     Evaluates control over the central squares.
     """
+    own = evaluate_center_control_for_color(board, 'PNBRQK' if board.white_to_move else 'pnbrqk')
+    enemy = evaluate_center_control_for_color(board, 'pnbrqk' if board.white_to_move else 'PNBRQK')
+    return own - enemy
+
+def evaluate_center_control_for_color(board, pieces):
+    """
+    Center control of one colour's pieces.
+    """
     score = 0
     central_squares = [27, 28, 35, 36]  # D4, E4, D5, E5
-    own_pieces = 'PNBRQK' if board.white_to_move else 'pnbrqk'
-    for piece in own_pieces:
+    for piece in pieces:
         bitboard = board.bitboards.get(piece, 0)
         if bitboard:
             squares = board.get_squares_from_bitboard(bitboard)
@@ -382,17 +442,24 @@ def evaluate_piece_coordination(board):
     """
     Evaluates how well pieces are coordinating with each other.
     """
+    own = evaluate_piece_coordination_for_color(board, 'PNBRQK' if board.white_to_move else 'pnbrqk')
+    enemy = evaluate_piece_coordination_for_color(board, 'pnbrqk' if board.white_to_move else 'PNBRQK')
+    return own - enemy
+
+def evaluate_piece_coordination_for_color(board, pieces):
+    """
+    Coordination of one colour's pieces.
+    """
     score = 0
-    own_pieces = 'PNBRQK' if board.white_to_move else 'pnbrqk'
-    for piece in own_pieces:
+    for piece in pieces:
         bitboard = board.bitboards.get(piece, 0)
         if bitboard:
             squares = board.get_squares_from_bitboard(bitboard)
             for from_square in squares:
                 attacks = board.generate_piece_moves(piece, from_square, attacks_only=True)
                 for move in attacks:
-                    target_piece = board.get_piece_at_square(move.to_square)
-                    if target_piece and target_piece in own_pieces:
+                    target_piece = board.mailbox[move.to_square]
+                    if target_piece and target_piece in pieces:
                         score += 10
     return score
 
@@ -439,58 +506,49 @@ def is_pawn_passed(square, enemy_pawns, is_white):
 
 def evaluate_threats(board):
     """
-    Evaluates threats posed by own pieces.
+    Evaluates threats posed by own pieces against those posed by enemy
+    pieces.
     """
-    score = 0
     own_moves = board.generate_legal_moves(simulate=False)
-    for move in own_moves:
-        if board.is_capture_move(move):
-            captured_value = abs(PIECE_VALUES.get(move.captured_piece.upper(), 0))
-            attacker_value = abs(PIECE_VALUES.get(move.piece.upper(), 0))
-            trade_gain = captured_value - attacker_value
-            score += trade_gain
-        elif is_threatening_move(board, move):
-            score += 15
-    return score
+    enemy_moves = board.generate_legal_moves(simulate=False, own=False)
+    return evaluate_threats_for_moves(board, own_moves) - evaluate_threats_for_moves(board, enemy_moves)
 
-def is_threatening_move(board, move):
+def evaluate_threats_for_moves(board, moves):
     """
-    Determines if a move is threatening an enemy piece.
+    Sums, over the attacked pieces, the material the best capture of each
+    wins. Several attackers on one piece count once, since only one of
+    them can take it. An attacked king is a check, not a threat, and is
+    left out.
     """
-    target_piece = board.get_piece_at_square(move.to_square)
-    if target_piece and target_piece.islower() != move.piece.islower():
-        return True
-    return False
+    gains = {}
+    for move in moves:
+        if board.is_capture_move(move) and move.captured_piece not in ('K', 'k'):
+            # Only exchanges that win material are threats
+            gain = board.see(move)
+            if gain > gains.get(move.to_square, 0):
+                gains[move.to_square] = gain
+    return sum(gains.values())
 
 def evaluate_opponent_weaknesses(board):
     """
-    Evaluates weaknesses in the opponent's position.
+    Evaluates undefended enemy pieces against undefended own pieces.
     """
     score = 0
-    enemy_pieces = 'pnbrqk' if board.white_to_move else 'PNBRQK'
-    for piece in enemy_pieces:
+    for piece in 'PNBRQKpnbrqk':
         bitboard = board.bitboards.get(piece, 0)
         if bitboard:
+            own = piece.isupper() == board.white_to_move
             squares = board.get_squares_from_bitboard(bitboard)
             for square in squares:
-                if is_piece_undefended(board, square, own=False):
-                    score += 20
+                if is_piece_undefended(board, square, own=own):
+                    score += -20 if own else 20
     return score
 
 def is_piece_undefended(board, square, own=True):
     """
     Checks if a piece at a given square is undefended.
     """
-    own_pieces = 'PNBRQK' if (board.white_to_move == own) else 'pnbrqk'
-    for piece in own_pieces:
-        bitboard = board.bitboards.get(piece, 0)
-        if bitboard:
-            from_squares = board.get_squares_from_bitboard(bitboard)
-            for from_square in from_squares:
-                attacks = board.generate_piece_moves(piece, from_square, attacks_only=True)
-                if any(move.to_square == square for move in attacks):
-                    return False
-    return True
+    return not board.attackers_to(square, board.white_to_move == own)
 
 
 
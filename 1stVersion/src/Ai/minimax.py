@@ -1,13 +1,96 @@
 from src.Ai.evaluation import evaluate
-import time
+from src.core.move import (
+    Move, PIECE_SYMBOLS, PIECE_SHIFT, PIECE_MASK, CAPTURE_SHIFT, CAPTURE_MASK, PROMOTION_MASK,
+    PROMOTION_SHIFT, CASTLING_FLAG, move_to_uci,
+)
+from src.core.constants import SEE_VALUES
+from src.Ai.transposition import TranspositionTable, EXACT, LOWERBOUND, UPPERBOUND
+from src.Ai.timemanager import TimeManager, NODE_CHECK_INTERVAL
+from src.Ai.stats import SearchStats
+import os
 
-TT_SIZE = 1000000
-transposition_table = {}
+TT_SIZE_MB = 64
+transposition_table = TranspositionTable(TT_SIZE_MB)
+
+INFINITY = 1000000
+
+# Principal variation search and aspiration windows; the flags exist so the
+# benchmark can compare against plain alpha-beta.
+USE_PVS = True
+USE_ASPIRATION = True
+ASPIRATION_DEPTH = 3
+ASPIRATION_WINDOW = 200
+ASPIRATION_PARITY = 2
+
+# Null-move pruning: passing is tried at null-window nodes of at least
+# NULL_MOVE_MIN_DEPTH when the side to move has pieces besides pawns.
+USE_NULL_MOVE = True
+NULL_MOVE_MIN_DEPTH = 3
+NULL_MOVE_REDUCTION = 2
+
+# Late move reductions: quiet, non-checking, non-killer moves after the
+# first LMR_MIN_MOVES are searched LMR_REDUCTION plies shallower with a
+# null window, and re-searched at full depth if they beat alpha.
+USE_LMR = True
+LMR_MIN_DEPTH = 3
+LMR_MIN_MOVES = 3
+LMR_REDUCTION = 1
+
+# Frontier pruning, only at null-window nodes that are not in check. Margins
+# are indexed by remaining depth; the reverse futility margin is per ply.
+# Razoring is off: its quiescence check cannot see sacrifices, and it loses
+# positions of the tactical suite (python -m src.Ai.bench --tactics).
+USE_FUTILITY = True
+FUTILITY_MARGINS = [0, 200, 350, 500]
+USE_REVERSE_FUTILITY = True
+REVERSE_FUTILITY_MAX_DEPTH = 3
+REVERSE_FUTILITY_MARGIN = 150
+USE_RAZORING = False
+RAZOR_MARGINS = [0, 350, 550]
+
+# Quiescence pruning
+USE_DELTA_PRUNING = True
+DELTA_MARGIN = 200
+USE_SEE_PRUNING = True
+
+# Number of nodes (or moves, for futility) cut by each pruning technique
+# during the last search
+pruning_counts = {
+    'null_move': 0, 'reverse_futility': 0, 'razoring': 0, 'futility': 0, 'delta': 0, 'see': 0,
+}
+
+# Scores beyond this are mate scores
+MATE_BOUND = 90000
+
+node_count = 0
+# Nodes of node_count that were quiescence nodes
+qnode_count = 0
+# Statistics of the last (or running) search
+search_stats = SearchStats()
+# Limits of the running search, polled by negamax whenever node_count
+# reaches next_time_check
+time_manager = TimeManager()
+next_time_check = 0
+# Cumulative node count after each completed iteration of the last search
+iteration_nodes = []
+
+MAX_PLY = 64
+killer_moves = [[0, 0] for _ in range(MAX_PLY)]
+
+# Beta cutoffs in the last search, and how many came from the first move
+cutoff_counts = {'cutoffs': 0, 'first_move': 0}
 
 def quiescence_search(board, alpha, beta, color, depth=0, max_depth=4):
     """
     Performs a quiescence search to evaluate positions with potential captures.
+    Only captures and queen promotions are searched, in MVV-LVA order.
+    Captures that cannot lift the score to alpha even with DELTA_MARGIN to
+    spare (delta pruning) and captures with a negative static exchange
+    value are skipped.
     """
+    global node_count, qnode_count
+    node_count += 1
+    qnode_count += 1
     stand_pat = color * evaluate(board)
     if stand_pat >= beta:
         return beta
@@ -17,10 +100,22 @@ def quiescence_search(board, alpha, beta, color, depth=0, max_depth=4):
     if depth >= max_depth:
         return stand_pat
 
-    capture_moves = board.generate_capture_moves()
-    capture_moves = order_moves(board, capture_moves)
+    scored_moves = []
+    for move in board.generate_tactical_moves():
+        promoted = (move >> PROMOTION_SHIFT) & PIECE_MASK
+        if promoted:
+            if PIECE_SYMBOLS[promoted - 1] not in 'Qq':
+                continue
+        elif USE_DELTA_PRUNING and stand_pat + capture_gain(move) + DELTA_MARGIN <= alpha:
+            pruning_counts['delta'] += 1
+            continue
+        scored_moves.append((capture_score(move), move))
+    scored_moves.sort(reverse=True)
 
-    for move in capture_moves:
+    for _, move in scored_moves:
+        if USE_SEE_PRUNING and not board.see_ge(move, 0):
+            pruning_counts['see'] += 1
+            continue
         board.make_move(move)
         score = -quiescence_search(board, -beta, -alpha, -color, depth + 1, max_depth)
         board.undo_move(move)
@@ -30,45 +125,112 @@ def quiescence_search(board, alpha, beta, color, depth=0, max_depth=4):
             alpha = score
     return alpha
 
-def negamax(board, depth, alpha, beta, color, start_time, time_limit):
+def negamax(board, depth, alpha, beta, color, ply=1, allow_null=True):
     """
     Implements the Negamax algorithm with alpha-beta pruning and transposition tables.
+    The first move is searched with the full window and the rest with a null
+    window (principal variation search), re-searching those that fail high.
+    Null-window nodes may first try passing (null-move pruning), and late
+    quiet moves are searched at reduced depth (late move reductions).
+    Raises TimeoutError when time_manager says to stop.
     """
-    if time.time() - start_time > time_limit:
-        raise TimeoutError("Search timed out")
+    global node_count, next_time_check
+    node_count += 1
+    if node_count >= next_time_check:
+        next_time_check = node_count + NODE_CHECK_INTERVAL
+        if time_manager.check(node_count):
+            raise TimeoutError("Search timed out")
 
     board_hash = board.zobrist_hash
     alpha_orig = alpha
 
-    tt_entry = transposition_table.get(board_hash)
-    if tt_entry and tt_entry['depth'] >= depth:
-        if tt_entry['flag'] == 'exact':
-            return tt_entry['value']
-        elif tt_entry['flag'] == 'lowerbound':
-            alpha = max(alpha, tt_entry['value'])
-        elif tt_entry['flag'] == 'upperbound':
-            beta = min(beta, tt_entry['value'])
+    tt_entry = transposition_table.probe(board_hash)
+    hash_move = tt_entry[3] if tt_entry else 0
+    if tt_entry and tt_entry[1] >= depth:
+        tt_value, _, tt_flag, _ = tt_entry
+        if tt_flag == EXACT:
+            return tt_value
+        elif tt_flag == LOWERBOUND:
+            alpha = max(alpha, tt_value)
+        elif tt_flag == UPPERBOUND:
+            beta = min(beta, tt_value)
         if alpha >= beta:
-            return tt_entry['value']
+            return tt_value
 
-    if depth == 0:
+    if depth <= 0:
         return quiescence_search(board, alpha, beta, color)
 
-    moves = board.generate_legal_moves()
-    if not moves:
-        if board.is_in_check():
-            return -100000 + board.fullmove_number  # Checkmate
-        else:
-            return 0  # Stalemate
+    in_check = board.is_in_check()
+    is_pv_node = beta - alpha > 1
+    static_eval = None
+    if not is_pv_node and not in_check:
+        static_eval = color * evaluate(board)
 
-    moves = order_moves(board, moves)
+        # Reverse futility: far enough above beta that no move is expected
+        # to bring the score back down within the remaining depth
+        if (USE_REVERSE_FUTILITY and depth <= REVERSE_FUTILITY_MAX_DEPTH and abs(beta) < MATE_BOUND
+                and static_eval - REVERSE_FUTILITY_MARGIN * depth >= beta):
+            pruning_counts['reverse_futility'] += 1
+            return static_eval
+
+        # Razoring: far enough below alpha that only tactics could help, so
+        # let quiescence confirm the fail low
+        if (USE_RAZORING and depth <= len(RAZOR_MARGINS) - 1 and alpha > -MATE_BOUND
+                and static_eval + RAZOR_MARGINS[depth] <= alpha):
+            score = quiescence_search(board, alpha, alpha + 1, color)
+            if score <= alpha:
+                pruning_counts['razoring'] += 1
+                return score
+
+    if (USE_NULL_MOVE and allow_null and static_eval is not None
+            and depth >= NULL_MOVE_MIN_DEPTH and abs(beta) < MATE_BOUND
+            and board.has_non_pawn_material(board.white_to_move)
+            and static_eval >= beta):
+        reduction = NULL_MOVE_REDUCTION + (1 if depth >= 6 else 0)
+        board.make_null_move()
+        try:
+            eval = -negamax(board, depth - 1 - reduction, -beta, -beta + 1, -color, ply + 1, allow_null=False)
+        except TimeoutError:
+            board.undo_null_move()
+            raise
+        board.undo_null_move()
+        if eval >= beta:
+            pruning_counts['null_move'] += 1
+            return beta
+
+    # Futility: at frontier nodes well below alpha, quiet moves cannot
+    # raise the score enough and are skipped
+    futility_value = None
+    if (USE_FUTILITY and static_eval is not None and depth <= len(FUTILITY_MARGINS) - 1
+            and alpha > -MATE_BOUND and static_eval + FUTILITY_MARGINS[depth] <= alpha):
+        futility_value = static_eval + FUTILITY_MARGINS[depth]
 
-    max_eval = float('-inf')
+    killers = killer_moves[ply] if ply < MAX_PLY else ()
+    max_eval = -INFINITY
     best_move = None
-    for move in moves:
+    moves_searched = 0
+    for move in pick_moves(board, hash_move, ply):
+        if (futility_value is not None and moves_searched
+                and not move & (CAPTURE_MASK | PROMOTION_MASK) and not board.gives_check(move)):
+            pruning_counts['futility'] += 1
+            max_eval = max(max_eval, futility_value)
+            continue
+        moves_searched += 1
+        reduction = 0
+        if (USE_LMR and depth >= LMR_MIN_DEPTH and moves_searched > LMR_MIN_MOVES and not in_check
+                and not move & (CAPTURE_MASK | PROMOTION_MASK) and move not in killers
+                and not board.gives_check(move)):
+            reduction = LMR_REDUCTION
         board.make_move(move)
         try:
-            eval = -negamax(board, depth - 1, -beta, -alpha, -color, start_time, time_limit)
+            if moves_searched == 1 or not USE_PVS:
+                eval = -negamax(board, depth - 1, -beta, -alpha, -color, ply + 1)
+            else:
+                eval = -negamax(board, depth - 1 - reduction, -alpha - 1, -alpha, -color, ply + 1)
+                if reduction and eval > alpha:
+                    eval = -negamax(board, depth - 1, -alpha - 1, -alpha, -color, ply + 1)
+                if alpha < eval < beta:
+                    eval = -negamax(board, depth - 1, -beta, -alpha, -color, ply + 1)
         except TimeoutError:
             board.undo_move(move)
             raise
@@ -78,24 +240,100 @@ def negamax(board, depth, alpha, beta, color, start_time, time_limit):
             best_move = move
         alpha = max(alpha, eval)
         if alpha >= beta:
+            cutoff_counts['cutoffs'] += 1
+            if moves_searched == 1:
+                cutoff_counts['first_move'] += 1
+            if not move & (CAPTURE_MASK | PROMOTION_MASK):
+                store_killer(ply, move)
             break
 
-    flag = 'exact'
+    if not moves_searched:
+        if in_check:
+            return -100000 + board.fullmove_number  # Checkmate
+        else:
+            return 0  # Stalemate
+
+    flag = EXACT
     if max_eval <= alpha_orig:
-        flag = 'upperbound'
+        flag = UPPERBOUND
     elif max_eval >= beta:
-        flag = 'lowerbound'
+        flag = LOWERBOUND
 
-    if len(transposition_table) > TT_SIZE:
-        transposition_table.clear()
-    transposition_table[board_hash] = {'value': max_eval, 'depth': depth, 'flag': flag, 'best_move': best_move}
+    transposition_table.store(board_hash, max_eval, depth, flag, best_move or 0)
 
     return max_eval
 
-def find_best_move(board, max_depth, time_limit=5.0):
+def search_root(board, moves, depth, alpha, beta, color, progress=None):
+    """
+    Searches the root moves in order with principal variation search and
+    returns (best score, best move). The score is fail-soft, so a result
+    outside (alpha, beta) tells the caller which side of the window failed.
+    Whenever a move completes with a score above alpha, progress (a dict) is
+    updated with its 'score' and 'move', so an interrupted search can still
+    use it.
+    """
+    alpha_orig = alpha
+    best_eval = -INFINITY
+    best_move = None
+    for move in moves:
+        board.make_move(move)
+        try:
+            if best_move is None or not USE_PVS:
+                eval = -negamax(board, depth - 1, -beta, -alpha, -color)
+            else:
+                eval = -negamax(board, depth - 1, -alpha - 1, -alpha, -color)
+                if alpha < eval < beta:
+                    eval = -negamax(board, depth - 1, -beta, -alpha, -color)
+        except TimeoutError:
+            board.undo_move(move)
+            raise
+        board.undo_move(move)
+        if eval > best_eval:
+            best_eval = eval
+            best_move = move
+            if progress is not None and eval > alpha_orig:
+                progress['score'] = eval
+                progress['move'] = move
+        alpha = max(alpha, eval)
+        if alpha >= beta:
+            break
+    return best_eval, best_move
+
+def find_best_move(board, max_depth, time_limit=5.0, verbose=True, start_depth=1, iteration_callback=None,
+                   workers=1, limits=None, stats=None, clear_tables=False):
     """
     Finds the best move using iterative deepening and Negamax with alpha-beta pruning.
+    From ASPIRATION_DEPTH on, each iteration starts with a window of
+    ASPIRATION_WINDOW around the previous score, widened on the failing side
+    until the score falls inside it. iteration_callback, if given, is called
+    as iteration_callback(depth, score, move, nodes), with move a Move,
+    after every completed iteration; the parallel searches use the same
+    signature. With workers > 1 the root moves are searched in parallel by
+    src.Ai.parallel.find_best_move_split instead.
+
+    limits, a TimeManager, replaces the fixed time_limit, e.g. for clock
+    based time control, a node budget, or to stop the search from another
+    thread. The first iteration always completes, however tight the
+    limits, so a move is returned whenever one exists. If a later
+    iteration is interrupted after a move beat the previous best, that
+    move is returned.
+
+    clear_tables starts the search from an empty transposition table, so
+    a node limited search of a position always gives the same
+    result. It is off by default, since it also throws away a table
+    loaded with load_transposition_table or filled by pondering.
+
+    stats, a SearchStats, receives an info record after every completed
+    iteration (see src.Ai.stats); without it a fresh one is used. Either
+    way it is available as search_stats afterwards.
     """
+    global node_count, qnode_count, next_time_check, time_manager, search_stats
+    if limits is None:
+        limits = TimeManager(time_limit)
+    if workers > 1:
+        from src.Ai.parallel import find_best_move_split
+        return find_best_move_split(board, max_depth, verbose=verbose, iteration_callback=iteration_callback,
+                                    workers=workers, limits=limits)
     best_move = None
     color = 1 if board.white_to_move else -1
     moves = board.generate_legal_moves()
@@ -103,35 +341,201 @@ def find_best_move(board, max_depth, time_limit=5.0):
         return None
 
     moves = order_moves(board, moves)
-    start_time = time.time()
+    limits.start()
+    time_manager = limits
+    clear_killers()
+    if clear_tables:
+        transposition_table.clear()
+    transposition_table.new_search()
+    node_count = 0
+    qnode_count = 0
+    # Limits are only polled once the first iteration has produced a move
+    next_time_check = INFINITY
+    search_stats = stats if stats is not None else SearchStats()
+    search_stats.start(transposition_table)
+    iteration_nodes.clear()
+    for technique in pruning_counts:
+        pruning_counts[technique] = 0
+    cutoff_counts['cutoffs'] = 0
+    cutoff_counts['first_move'] = 0
+    scores = []
+
+    progress = {}
 
     try:
-        for depth in range(1, max_depth + 1):
-            current_best_eval = float('-inf')
-            current_best_move = None
-            alpha = float('-inf')
-            beta = float('inf')
-            for move in moves:
-                board.make_move(move)
-                try:
-                    eval = -negamax(board, depth - 1, -beta, -alpha, -color, start_time, time_limit)
-                except TimeoutError:
-                    board.undo_move(move)
-                    raise
-                board.undo_move(move)
-                if eval > current_best_eval:
-                    current_best_eval = eval
-                    current_best_move = move
-                alpha = max(alpha, eval)
+        for depth in range(start_depth, max_depth + 1):
+            progress = {}
+            delta = ASPIRATION_WINDOW
+            if USE_ASPIRATION and depth >= ASPIRATION_DEPTH and len(scores) >= ASPIRATION_PARITY:
+                # Centre on the last iteration that ended with the same side
+                # to move, since the evaluation swings between odd and even depths
+                centre = scores[-ASPIRATION_PARITY]
+                alpha = max(centre - delta, -INFINITY)
+                beta = min(centre + delta, INFINITY)
+            else:
+                alpha, beta = -INFINITY, INFINITY
+            while True:
+                current_best_eval, current_best_move = search_root(
+                    board, moves, depth, alpha, beta, color, progress)
+                if current_best_eval <= alpha:
+                    alpha = max(current_best_eval - delta, -INFINITY)
+                elif current_best_eval >= beta:
+                    beta = min(current_best_eval + delta, INFINITY)
+                    moves = [current_best_move] + [m for m in moves if m != current_best_move]
+                else:
+                    break
+                delta *= 2
+            scores.append(current_best_eval)
+            iteration_nodes.append(node_count)
+            next_time_check = min(next_time_check, node_count)
             if current_best_move:
                 best_move = current_best_move
-            if time.time() - start_time > time_limit:
+                transposition_table.store(board.zobrist_hash, current_best_eval, depth, EXACT, best_move)
+                pv = get_principal_variation(board, depth)
+                info = search_stats.record_iteration(
+                    depth, current_best_eval, pv, node_count, qnode_count, transposition_table, cutoff_counts)
+                if verbose:
+                    print(f"Depth {depth}: score {current_best_eval}, nodes {node_count}, nps {info['nps']}, "
+                          f"pv {' '.join(info['pv'])}")
+                if iteration_callback is not None:
+                    iteration_callback(depth, current_best_eval, Move.from_code(best_move), node_count)
+            if not limits.should_start_iteration(node_count):
                 break
             moves = [best_move] + [m for m in moves if m != best_move]
     except TimeoutError:
-        pass
+        if progress.get('move') and progress['move'] != best_move:
+            best_move = progress['move']
+            if verbose:
+                print(f"Depth {depth} interrupted: score {progress['score']}, nodes {node_count}, "
+                      f"move {move_to_uci(best_move)}")
+
+    return Move.from_code(best_move) if best_move is not None else None
+
+def save_transposition_table(path):
+    """
+    Saves the transposition table so that a later process can start from it.
+    """
+    transposition_table.save(path)
+
+def load_transposition_table(path):
+    """
+    Replaces the transposition table with the one saved at path, if the
+    file exists, and returns whether it did. The table is kept across
+    searches; each search starts a new generation, so entries from
+    earlier sessions answer probes but are replaced first.
+    """
+    global transposition_table
+    if not os.path.exists(path):
+        return False
+    transposition_table = TranspositionTable.load(path)
+    return True
+
+def get_principal_variation(board, max_length=MAX_PLY):
+    """
+    Follows the best moves stored in the transposition table from the
+    current position and returns them as a list of Move objects. Stops at
+    a missing or illegal move, or when a position repeats.
+    """
+    pv = []
+    seen = {board.zobrist_hash}
+    while len(pv) < max_length:
+        tt_entry = transposition_table.probe(board.zobrist_hash)
+        if not tt_entry or not tt_entry[3] or not board.is_legal(tt_entry[3]):
+            break
+        move = tt_entry[3]
+        board.make_move(move)
+        pv.append(Move.from_code(move))
+        if board.zobrist_hash in seen:
+            break
+        seen.add(board.zobrist_hash)
+    for move in reversed(pv):
+        board.undo_move(move)
+    return pv
+
+def pick_moves(board, hash_move=0, ply=0):
+    """
+    Yields legal moves in stages: the hash move, winning captures and
+    promotions, killer moves, quiet moves, then losing captures. Each stage
+    is generated only once the earlier ones failed to produce a cutoff.
+    """
+    if hash_move and board.is_legal(hash_move):
+        yield hash_move
+    else:
+        hash_move = 0
+
+    good_captures = []
+    bad_captures = []
+    for move in board.generate_tactical_moves():
+        if move == hash_move:
+            continue
+        if not board.see_ge(move, 0):
+            bad_captures.append((capture_score(move), move))
+        else:
+            good_captures.append((capture_score(move), move))
+    good_captures.sort(reverse=True)
+    for _, move in good_captures:
+        yield move
+
+    killers = killer_moves[ply] if ply < MAX_PLY else ()
+    tried_quiets = [hash_move]
+    for killer in killers:
+        if killer not in tried_quiets and not killer & (CAPTURE_MASK | PROMOTION_MASK) and board.is_legal(killer):
+            tried_quiets.append(killer)
+            yield killer
+
+    for move in board.generate_quiet_moves():
+        if move not in tried_quiets:
+            yield move
+
+    bad_captures.sort(reverse=True)
+    for _, move in bad_captures:
+        yield move
+
+def capture_score(move):
+    """
+    MVV-LVA score for a capture or promotion.
+    """
+    score = 0
+    captured = (move >> CAPTURE_SHIFT) & PIECE_MASK
+    if captured:
+        score += 10 * SEE_VALUES[(captured - 1) % 6]
+        score -= SEE_VALUES[((move >> PIECE_SHIFT) & PIECE_MASK) % 6]
+    promoted = (move >> PROMOTION_SHIFT) & PIECE_MASK
+    if promoted:
+        score += 10 * SEE_VALUES[(promoted - 1) % 6]
+    return score
+
+def capture_gain(move):
+    """
+    Material won by a capture, ignoring any recapture.
+    """
+    captured = (move >> CAPTURE_SHIFT) & PIECE_MASK
+    return SEE_VALUES[(captured - 1) % 6] if captured else 0
+
+def store_killer(ply, move):
+    """
+    Remembers a quiet move that caused a beta cutoff at this ply.
+    """
+    if ply >= MAX_PLY or move & (CAPTURE_MASK | PROMOTION_MASK):
+        return
+    killers = killer_moves[ply]
+    if killers[0] != move:
+        killers[1] = killers[0]
+        killers[0] = move
 
-    return best_move
+def clear_killers():
+    for killers in killer_moves:
+        killers[0] = 0
+        killers[1] = 0
+
+def first_move_cutoff_rate():
+    """
+    Share of beta cutoffs in the last search that came from the first move
+    tried, the usual measure of move ordering quality.
+    """
+    if not cutoff_counts['cutoffs']:
+        return 0.0
+    return cutoff_counts['first_move'] / cutoff_counts['cutoffs']
 
 def order_moves(board, moves):
     """
@@ -140,26 +544,14 @@ def order_moves(board, moves):
     """
     def move_ordering(move):
         score = 0
-        if move.is_capture:
-            captured_value = get_piece_value(move.captured_piece)
-            attacker_value = get_piece_value(move.piece)
-            score += 10 * (captured_value - attacker_value)
-        if move.promotion:
+        if move & CAPTURE_MASK:
+            score += 10 * board.see(move)
+        if move & PROMOTION_MASK:
             score += 900
-        if board.is_check_move(move):
+        if board.gives_check(move):
             score += 50
-        if move.is_castling:
+        if move & CASTLING_FLAG:
             score += 30
         return score
 
     return sorted(moves, key=move_ordering, reverse=True)
-
-def get_piece_value(piece):
-    """
-    Returns the value of a piece for move ordering.
-    """
-    piece_values = {
-        'P': 100, 'N': 320, 'B': 330, 'R': 500, 'Q': 900, 'K': 20000,
-        'p': 100, 'n': 320, 'b': 330, 'r': 500, 'q': 900, 'k': 20000
-    }
-    return piece_values.get(piece, 0)
@@ -0,0 +1,296 @@
+"""
+Multi-process search, in two flavours.
+
+Lazy SMP: several worker processes run the normal iterative deepening
+search on the same root and share one transposition table placed in
+multiprocessing.shared_memory. The table needs no locks (see
+transposition.py); whatever one worker stores, the others pick up as hash
+moves and cutoffs. Odd-numbered workers start one ply deeper so the
+processes spread over different depths. The main process only collects
+results and returns the move of the deepest completed iteration.
+
+Root splitting: a pool of long-lived worker processes searches the root
+moves of each iteration, every move as one task. Each root move has its
+own small transposition table in a shared memory segment, kept for the
+whole search, so every task continues from what earlier iterations
+stored for its move. Only tasks for that move touch the table, never two
+at a time, so its contents depend only on the sequence of searches of
+the move, and the result of an iteration does not depend on scheduling
+or on the number of workers.
+"""
+
+import multiprocessing
+import os
+import queue
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from src.Ai import minimax
+from src.Ai.timemanager import TimeManager
+from src.Ai.transposition import TranspositionTable, table_bytes
+from src.core.board import Board
+from src.core.move import Move, move_to_uci
+
+DEFAULT_THREADS = os.cpu_count() or 1
+SMP_TT_SIZE_MB = minimax.TT_SIZE_MB
+# Extra time given to workers to report before they are terminated
+SMP_GRACE_PERIOD = 1.0
+# Transposition table size per root move for root splitting
+ROOT_SPLIT_TT_SIZE_MB = 1
+
+_root_pool = None
+_root_pool_workers = 0
+# The board each root splitting worker reuses for its tasks, and the
+# shared memory segment of the current search with the tables attached so far
+_worker_board = None
+_worker_shm = None
+_worker_tables = {}
+
+
+def _smp_worker(fen, shm_name, size_mb, max_depth, time_limit, worker_id, results):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    table = TranspositionTable(size_mb, buffer=shm.buf)
+    minimax.transposition_table = table
+    board = Board.from_fen(fen)
+
+    def report(depth, score, move, nodes):
+        results.put((worker_id, depth, score, int(move), nodes))
+
+    try:
+        minimax.find_best_move(board, max_depth, time_limit, verbose=False,
+                               start_depth=1 + worker_id % 2, iteration_callback=report)
+    finally:
+        results.put((worker_id, None, None, None, minimax.node_count))
+        table.release()
+        shm.close()
+
+
+def find_best_move_smp(board, max_depth, time_limit=5.0, threads=DEFAULT_THREADS, size_mb=SMP_TT_SIZE_MB,
+                       verbose=True, iteration_callback=None):
+    """
+    Lazy SMP version of minimax.find_best_move using threads worker
+    processes. iteration_callback(depth, score, move, nodes), as in
+    find_best_move, is called whenever a worker completes a deeper
+    iteration than any before; nodes is that worker's count. The position is passed to the workers as
+    a FEN, so move history (and anything derived from it) is not shared.
+    """
+    if not board.generate_legal_moves():
+        return None
+
+    start_time = time.time()
+    fen = board.to_fen()
+    shm = shared_memory.SharedMemory(create=True, size=table_bytes(size_mb))
+    results = multiprocessing.Queue()
+    workers = [
+        multiprocessing.Process(
+            target=_smp_worker, args=(fen, shm.name, size_mb, max_depth, time_limit, worker_id, results),
+            daemon=True,
+        )
+        for worker_id in range(max(1, threads))
+    ]
+    best = None
+    try:
+        for worker in workers:
+            worker.start()
+        finished = 0
+        deadline = start_time + time_limit + SMP_GRACE_PERIOD
+        while finished < len(workers):
+            try:
+                worker_id, depth, score, move, nodes = results.get(timeout=max(0.0, deadline - time.time()))
+            except queue.Empty:
+                break
+            if depth is None:
+                finished += 1
+                continue
+            if best is None or depth > best[0]:
+                best = (depth, score, move)
+                if verbose:
+                    print(f"Depth {depth}: score {score}, move {move_to_uci(move)}, "
+                          f"worker {worker_id}, {time.time() - start_time:.2f}s")
+                if iteration_callback is not None:
+                    iteration_callback(depth, score, Move.from_code(move), nodes)
+    finally:
+        for worker in workers:
+            worker.join(timeout=SMP_GRACE_PERIOD)
+            if worker.is_alive():
+                worker.terminate()
+                worker.join()
+        results.close()
+        shm.close()
+        shm.unlink()
+
+    return Move.from_code(best[2]) if best else None
+
+
+def _root_worker_init():
+    global _worker_board
+    _worker_board = Board()
+
+
+def _root_move_table(shm_name, slot, size_mb):
+    """
+    Returns the transposition table of root move slot in the shared memory
+    segment shm_name, attaching to the segment on first use.
+    """
+    global _worker_shm
+    if _worker_shm is None or _worker_shm.name != shm_name:
+        for table in _worker_tables.values():
+            table.release()
+        _worker_tables.clear()
+        if _worker_shm is not None:
+            _worker_shm.close()
+        _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    if slot not in _worker_tables:
+        size = table_bytes(size_mb)
+        _worker_tables[slot] = TranspositionTable(size_mb, buffer=_worker_shm.buf[slot * size:(slot + 1) * size])
+    return _worker_tables[slot]
+
+
+def _search_root_move(shm_name, slot, size_mb, fen, move, depth, alpha, beta, start_time, hard_limit):
+    """
+    Searches one root move with the move's own transposition table and
+    fresh killers, and returns (move, fail-soft score, nodes),
+    with a score of None if the search ran out of time.
+    """
+    board = _worker_board
+    board.set_fen(fen)
+    minimax.transposition_table = _root_move_table(shm_name, slot, size_mb)
+    minimax.clear_killers()
+    minimax.node_count = 0
+    minimax.next_time_check = 0
+    minimax.time_manager = TimeManager(hard_limit)
+    minimax.time_manager.start(start_time)
+    color = 1 if board.white_to_move else -1
+    board.make_move(move)
+    try:
+        score = -minimax.negamax(board, depth - 1, -beta, -alpha, -color)
+    except TimeoutError:
+        score = None
+    return move, score, minimax.node_count
+
+
+def get_root_pool(workers):
+    """
+    Returns the shared root splitting pool, starting it (or restarting it
+    with a different size) as needed. Workers stay alive between searches.
+    """
+    global _root_pool, _root_pool_workers
+    if _root_pool is None or _root_pool_workers != workers:
+        shutdown_root_pool()
+        _root_pool = ProcessPoolExecutor(max_workers=workers, initializer=_root_worker_init)
+        _root_pool_workers = workers
+    return _root_pool
+
+
+def shutdown_root_pool():
+    global _root_pool, _root_pool_workers
+    if _root_pool is not None:
+        _root_pool.shutdown(cancel_futures=True)
+        _root_pool = None
+        _root_pool_workers = 0
+
+
+def _split_iteration(pool, shm_name, fen, moves, depth, hard_limit, start_time):
+    """
+    Searches the first root move with an open window and broadcasts its
+    score as alpha to null-window searches of all other moves in parallel.
+    As in principal variation search, the first move that fails high is
+    re-searched with (alpha, INFINITY), raises alpha, and the remaining
+    fail-high moves are tested again against the new alpha. Returns
+    ([(move, score)] in move order, nodes), or (None, nodes) on a timeout.
+    Only the best score is exact.
+    """
+    slots = {move: slot for slot, move in enumerate(sorted(moves))}
+    nodes = 0
+
+    def run(tasks, alpha, beta):
+        nonlocal nodes
+        futures = [
+            pool.submit(_search_root_move, shm_name, slots[move], ROOT_SPLIT_TT_SIZE_MB, fen, move, depth,
+                        alpha, beta, start_time, hard_limit)
+            for move in tasks
+        ]
+        scores = {}
+        for future in futures:
+            move, score, task_nodes = future.result()
+            nodes += task_nodes
+            scores[move] = score
+        return scores
+
+    scores = run(moves[:1], -minimax.INFINITY, minimax.INFINITY)
+    alpha = scores[moves[0]]
+    pending = moves[1:]
+    while alpha is not None and pending:
+        scores.update(run(pending, alpha, alpha + 1))
+        if any(scores[move] is None for move in pending):
+            break
+        pending = [move for move in pending if scores[move] > alpha]
+        if not pending:
+            break
+        move = pending.pop(0)
+        scores.update(run([move], alpha, minimax.INFINITY))
+        if scores[move] is None:
+            break
+        alpha = max(alpha, scores[move])
+    if any(score is None for score in scores.values()):
+        return None, nodes
+    return [(move, scores[move]) for move in moves], nodes
+
+
+def find_best_move_split(board, max_depth, time_limit=5.0, workers=DEFAULT_THREADS, verbose=True,
+                         iteration_callback=None, limits=None):
+    """
+    Iterative deepening where every iteration searches the root moves in
+    parallel on the root splitting pool (see _split_iteration). The
+    previous best move is searched first and keeps ties; the other moves
+    are ordered by their last score, with null-window results counting as
+    alpha. Of limits (a TimeManager), only the hard time limit reaches the
+    workers, from the second iteration on; node limits and stop() take
+    effect between iterations.
+    """
+    moves = board.generate_legal_moves()
+    if not moves:
+        return None
+
+    if limits is None:
+        limits = TimeManager(time_limit)
+    pool = get_root_pool(workers)
+    fen = board.to_fen()
+    moves = minimax.order_moves(board, moves)
+    limits.start()
+    minimax.node_count = 0
+    minimax.iteration_nodes.clear()
+    best_move = None
+    # One zeroed table per root move for the whole search
+    shm = shared_memory.SharedMemory(create=True, size=len(moves) * table_bytes(ROOT_SPLIT_TT_SIZE_MB))
+    try:
+        for depth in range(1, max_depth + 1):
+            # Like find_best_move, the first iteration always completes
+            hard_limit = limits.hard_limit if best_move is not None else float('inf')
+            results, nodes = _split_iteration(pool, shm.name, fen, moves, depth, hard_limit, limits.start_time)
+            minimax.node_count += nodes
+            if results is None:
+                break
+
+            current_best_move, current_best_eval = results[0]
+            for move, score in results[1:]:
+                if score > current_best_eval:
+                    current_best_move, current_best_eval = move, score
+            best_move = current_best_move
+            minimax.iteration_nodes.append(minimax.node_count)
+            if verbose:
+                print(f"Depth {depth}: score {current_best_eval}, nodes {minimax.node_count}, "
+                      f"move {move_to_uci(best_move)}")
+            if iteration_callback is not None:
+                iteration_callback(depth, current_best_eval, Move.from_code(best_move), minimax.node_count)
+            if not limits.should_start_iteration(minimax.node_count):
+                break
+            # Stable sort, so ties keep their order
+            ranked = sorted(results, key=lambda result: -min(result[1], current_best_eval))
+            moves = [best_move] + [move for move, _ in ranked if move != best_move]
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return Move.from_code(best_move) if best_move is not None else None
@@ -0,0 +1,102 @@
+"""
+Pondering: searching on the opponent's time.
+
+After the engine moves, Ponderer.start guesses the opponent's reply and
+searches the resulting position on a background thread, without a time
+limit. When the engine is to move again, Ponderer.finish checks whether the
+opponent played the expected reply. On a ponder hit the running search is
+given the normal time limit, counted from that moment, and its result is
+returned. On a miss the search is stopped and None is returned; the
+search the caller runs then still benefits from the transposition table
+the ponder search filled.
+
+The ponder search uses the module state of minimax (transposition table,
+killers), so no other search may run until finish or stop returns.
+"""
+
+import threading
+
+from src.Ai import minimax
+from src.Ai.timemanager import TimeManager
+from src.core.move import Move
+
+# Depth of the search that picks the expected reply when the transposition
+# table has no move for the position
+PONDER_GUESS_DEPTH = 2
+
+
+class Ponderer:
+    def __init__(self, max_depth=6, time_limit=5.0):
+        self.max_depth = max_depth
+        self.time_limit = time_limit
+        self.limits = None
+        self.thread = None
+        self.ponder_hash = None
+        self.result = None
+
+    @property
+    def running(self):
+        return self.thread is not None
+
+    def start(self, board):
+        """
+        Starts pondering on the opponent's time; board is the position with
+        the opponent to move, and is not modified.
+        """
+        self.stop()
+        if not board.generate_legal_moves():
+            return
+        self.limits = TimeManager()
+        self.result = None
+        self.ponder_hash = None
+        self.thread = threading.Thread(target=self._ponder, args=(board.copy(),), daemon=True)
+        self.thread.start()
+
+    def _ponder(self, board):
+        reply = guess_reply(board)
+        if reply is None:
+            return
+        board.make_move(reply)
+        self.ponder_hash = board.zobrist_hash
+        if self.limits.stopped:
+            return
+        self.result = minimax.find_best_move(board, self.max_depth, verbose=False, limits=self.limits)
+
+    def finish(self, board):
+        """
+        Called when the engine is to move in board. Returns the best move on
+        a ponder hit, otherwise stops pondering and returns None.
+        """
+        if self.thread is None:
+            return None
+        if self.ponder_hash is None or board.zobrist_hash != self.ponder_hash:
+            self.stop()
+            return None
+        # Ponder hit: from now on the search gets its normal time
+        elapsed = self.limits.elapsed()
+        self.limits.soft_limit = elapsed + self.time_limit
+        self.limits.hard_limit = elapsed + self.time_limit
+        self.thread.join()
+        self.thread = None
+        return self.result
+
+    def stop(self):
+        """
+        Stops pondering and waits for the background search to return.
+        """
+        if self.thread is None:
+            return
+        self.limits.stop()
+        self.thread.join()
+        self.thread = None
+
+
+def guess_reply(board):
+    """
+    Returns the expected move in board: the transposition table move left
+    by the previous search, or the result of a shallow search.
+    """
+    tt_entry = minimax.transposition_table.probe(board.zobrist_hash)
+    if tt_entry and tt_entry[3] and board.is_legal(tt_entry[3]):
+        return Move.from_code(tt_entry[3])
+    return minimax.find_best_move(board, PONDER_GUESS_DEPTH, float('inf'), verbose=False)
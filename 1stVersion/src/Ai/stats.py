@@ -0,0 +1,84 @@
+"""
+Search statistics.
+
+The search itself only bumps a few module counters in minimax; SearchStats
+turns them into one info record per completed iteration:
+
+    depth, score, pv            result of the iteration (pv in UCI)
+    nodes, qnodes               cumulative nodes, and how many were quiescence nodes
+    time, nps                   seconds since the search started, nodes per second
+    quiescence_share            qnodes / nodes
+    tt_hit_rate                 transposition table hits / probes
+    first_move_cutoff_rate      share of beta cutoffs caused by the first move
+    ebf                         effective branching factor: this iteration's nodes
+                                over the previous iteration's (None for the first)
+    hashfull                    permille of the table used by this search
+
+Records are passed to info_callback and, with jsonl_path, appended to a
+JSON-lines file as they come in.
+"""
+
+import json
+import time
+
+
+class SearchStats:
+    def __init__(self, info_callback=None, jsonl_path=None):
+        self.info_callback = info_callback
+        self.jsonl_path = jsonl_path
+        self.iterations = []
+        self.start_time = time.time()
+        self._tt_probes = 0
+        self._tt_hits = 0
+
+    def start(self, table):
+        """
+        Marks the start of a search using the transposition table table.
+        """
+        self.iterations = []
+        self.start_time = time.time()
+        self._tt_probes = table.probes
+        self._tt_hits = table.hits
+
+    def record_iteration(self, depth, score, pv, nodes, qnodes, table, cutoff_counts):
+        """
+        Builds the info record of a completed iteration, reports it and
+        returns it.
+        """
+        elapsed = time.time() - self.start_time
+        probes = table.probes - self._tt_probes
+        hits = table.hits - self._tt_hits
+        previous_nodes = self.iterations[-1]['nodes'] if self.iterations else 0
+        iteration_nodes = nodes - previous_nodes
+        previous_iteration_nodes = (
+            previous_nodes - (self.iterations[-2]['nodes'] if len(self.iterations) > 1 else 0)
+        )
+        info = {
+            'depth': depth,
+            'score': int(score),
+            'pv': [move.uci() for move in pv],
+            'nodes': nodes,
+            'qnodes': qnodes,
+            'time': round(elapsed, 4),
+            'nps': int(nodes / elapsed) if elapsed > 0 else 0,
+            'quiescence_share': round(qnodes / nodes, 4) if nodes else 0.0,
+            'tt_hit_rate': round(hits / probes, 4) if probes else 0.0,
+            'first_move_cutoff_rate': (
+                round(cutoff_counts['first_move'] / cutoff_counts['cutoffs'], 4) if cutoff_counts['cutoffs'] else 0.0
+            ),
+            'ebf': round(iteration_nodes / previous_iteration_nodes, 3) if previous_iteration_nodes else None,
+            'hashfull': table.hashfull(),
+        }
+        self.iterations.append(info)
+        if self.info_callback is not None:
+            self.info_callback(info)
+        if self.jsonl_path is not None:
+            with open(self.jsonl_path, 'a') as f:
+                f.write(json.dumps(info) + '\n')
+        return info
+
+    def summary(self):
+        """
+        Returns the record of the last completed iteration, or None.
+        """
+        return self.iterations[-1] if self.iterations else None
@@ -0,0 +1,100 @@
+"""
+Search limits.
+
+A TimeManager decides when a search has to stop. The search polls it every
+NODE_CHECK_INTERVAL nodes instead of reading the clock at every node.
+
+    hard limit  the running iteration is abandoned once it is exceeded
+    soft limit  no new iteration is started once it is exceeded
+    node limit  the search stops after about this many nodes, independent
+                of the clock, so fixed-node runs are reproducible
+    stop()      asks a running search to stop at its next poll; safe to
+                call from another thread
+"""
+
+import threading
+import time
+
+# Nodes between two polls. The search runs at roughly 500-1000 nodes per
+# second, so this keeps the overshoot to about 0.015-0.03 seconds, while a
+# poll costs far less than the nodes between two of them.
+NODE_CHECK_INTERVAL = 16
+
+# Clock management for time controls
+DEFAULT_MOVES_TO_GO = 30
+INCREMENT_SHARE = 0.75
+HARD_LIMIT_FACTOR = 3
+# Never plan to use more than this share of the remaining time on one move
+MAX_TIME_SHARE = 0.5
+# Time reserved for everything around the search (GUI, move transfer)
+MOVE_OVERHEAD = 0.05
+
+
+class TimeManager:
+    def __init__(self, time_limit=None, remaining=None, increment=0.0, moves_to_go=None, node_limit=None):
+        """
+        time_limit is a fixed time per move, used as both soft and hard
+        limit. Otherwise the limits are derived from remaining clock time,
+        increment and moves_to_go (all in seconds). With neither, only
+        node_limit and stop() end the search.
+        """
+        if time_limit is not None:
+            self.soft_limit = self.hard_limit = time_limit
+        elif remaining is not None:
+            self.soft_limit, self.hard_limit = allocate_time(remaining, increment, moves_to_go)
+        else:
+            self.soft_limit = self.hard_limit = float('inf')
+        self.node_limit = node_limit
+        self.start_time = time.time()
+        self._stop_event = threading.Event()
+
+    def start(self, start_time=None):
+        """
+        Restarts the clock, at start_time (a time.time() value) if given. A
+        stop request stays in effect, so stop() may be called before the
+        search gets going.
+        """
+        self.start_time = time.time() if start_time is None else start_time
+
+    def stop(self):
+        self._stop_event.set()
+
+    @property
+    def stopped(self):
+        return self._stop_event.is_set()
+
+    def elapsed(self):
+        return time.time() - self.start_time
+
+    def check(self, nodes):
+        """
+        Called by the search every NODE_CHECK_INTERVAL nodes. Returns True,
+        and marks the search as stopped, once a hard limit is reached.
+        """
+        if self._stop_event.is_set():
+            return True
+        if (self.node_limit is not None and nodes >= self.node_limit) or self.elapsed() > self.hard_limit:
+            self._stop_event.set()
+            return True
+        return False
+
+    def should_start_iteration(self, nodes):
+        """
+        Whether another iteration may be started after the one that just
+        completed.
+        """
+        return not self.check(nodes) and self.elapsed() <= self.soft_limit
+
+
+def allocate_time(remaining, increment=0.0, moves_to_go=None):
+    """
+    Returns (soft, hard) limits in seconds for one move with remaining
+    seconds on the clock.
+    """
+    available = max(0.0, remaining - MOVE_OVERHEAD)
+    moves_to_go = moves_to_go or DEFAULT_MOVES_TO_GO
+    soft = available / moves_to_go + increment * INCREMENT_SHARE
+    hard = min(soft * HARD_LIMIT_FACTOR, available * MAX_TIME_SHARE + increment * INCREMENT_SHARE)
+    hard = min(hard, available)
+    soft = min(soft, hard)
+    return soft, hard
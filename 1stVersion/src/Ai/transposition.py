@@ -0,0 +1,271 @@
+"""
+Fixed-size transposition table.
+
+The table is a single preallocated buffer of 64-bit words, viewed through a
+memoryview: the first half holds the position keys, the second half the
+packed entry data, slot for slot. Slots are grouped into buckets of
+BUCKET_SIZE; a position can only live in the bucket selected by the low
+bits of its key, and the stored key verifies that a slot really belongs
+to it.
+
+The key word is stored XORed with the data word. When several processes
+share the buffer without locks, a slot whose two words come from
+different writes then fails verification and reads as a miss instead of
+returning another position's data.
+
+Packed entry layout:
+    bits  0-25  best move (packed move, 0 = none)
+    bits 26-45  score + SCORE_OFFSET
+    bits 46-53  depth
+    bits 54-55  bound flag (0 = empty slot)
+    bits 56-61  search age
+
+A table can be saved to a file (a FILE_HEADER_BYTES header followed by the
+raw buffer) and loaded back memory-mapped, so a restarted process starts
+with the entries of an earlier session. Keys stay valid across processes
+because the Zobrist keys are generated from a fixed seed; the header
+records one of them to reject files made with other keys.
+"""
+
+import mmap
+import os
+import struct
+
+from src.core.constants import ZOBRIST_SIDE_KEY
+
+EXACT = 1
+LOWERBOUND = 2
+UPPERBOUND = 3
+
+BUCKET_SIZE = 4
+ENTRY_BYTES = 16  # one key word and one data word
+
+MOVE_MASK = (1 << 26) - 1
+SCORE_SHIFT = 26
+SCORE_BITS = 20
+SCORE_OFFSET = 1 << (SCORE_BITS - 1)
+SCORE_MASK = (1 << SCORE_BITS) - 1
+DEPTH_SHIFT = 46
+DEPTH_MASK = 0xFF
+FLAG_SHIFT = 54
+FLAG_MASK = 0x3
+AGE_SHIFT = 56
+AGE_MASK = 0x3F
+
+MAX_SCORE = SCORE_OFFSET - 1
+KEY_MASK = (1 << 64) - 1
+
+FILE_MAGIC = b'PYTT'
+FILE_VERSION = 1
+# magic, version, age, number of entries, Zobrist side key
+FILE_HEADER = struct.Struct('<4sIIQQ')
+FILE_HEADER_BYTES = 64  # keeps the entries 8-byte aligned
+
+
+def pack_entry(value, depth, flag, move, age):
+    value = max(-MAX_SCORE, min(MAX_SCORE, int(value)))
+    return (
+        (move & MOVE_MASK) |
+        ((value + SCORE_OFFSET) << SCORE_SHIFT) |
+        (min(depth, DEPTH_MASK) << DEPTH_SHIFT) |
+        (flag << FLAG_SHIFT) |
+        (age << AGE_SHIFT)
+    )
+
+
+def unpack_entry(data):
+    """
+    Returns (value, depth, flag, move) for a packed entry.
+    """
+    return (
+        ((data >> SCORE_SHIFT) & SCORE_MASK) - SCORE_OFFSET,
+        (data >> DEPTH_SHIFT) & DEPTH_MASK,
+        (data >> FLAG_SHIFT) & FLAG_MASK,
+        data & MOVE_MASK,
+    )
+
+
+def table_bytes(size_mb):
+    """
+    Number of bytes a table of size_mb megabytes actually uses: the largest
+    power-of-two number of buckets that fits.
+    """
+    buckets = max(1, (int(size_mb * 1024 * 1024) // (ENTRY_BYTES * BUCKET_SIZE)))
+    return (1 << (buckets.bit_length() - 1)) * BUCKET_SIZE * ENTRY_BYTES
+
+
+class TranspositionTable:
+    def __init__(self, size_mb=64, buffer=None):
+        """
+        Allocates table_bytes(size_mb) bytes, or uses the given writable
+        buffer (e.g. a SharedMemory's buf) of at least that size, so that
+        several tables can share the same entries.
+        """
+        size = table_bytes(size_mb)
+        self.size_mb = size_mb
+        self.num_entries = size // ENTRY_BYTES
+        self.bucket_mask = self.num_entries // BUCKET_SIZE - 1
+        if buffer is None:
+            buffer = bytearray(size)
+        self.buffer = memoryview(buffer)[:size]
+        words = self.buffer.cast('Q')
+        self._words = words
+        self.keys = words[:self.num_entries]
+        self.data = words[self.num_entries:]
+        self.age = 0
+        self._mapping = None
+        self.reset_stats()
+
+    def release(self):
+        """
+        Releases the views on the buffer, which a SharedMemory requires
+        before it can be closed, and closes the file mapping of a loaded
+        table. The table is unusable afterwards.
+        """
+        for view in (self.keys, self.data, self._words, self.buffer):
+            view.release()
+        if self._mapping is not None:
+            self._mapping.close()
+            self._mapping = None
+
+    def save(self, path):
+        """
+        Writes the table to path. The file is replaced atomically, so a
+        table loaded from the same path stays valid.
+        """
+        header = FILE_HEADER.pack(FILE_MAGIC, FILE_VERSION, self.age, self.num_entries, ZOBRIST_SIDE_KEY)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(header.ljust(FILE_HEADER_BYTES, b'\0'))
+            f.write(self.buffer)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Returns the table saved at path, memory-mapped copy-on-write: pages
+        are read from the file as the search touches them, and changes stay
+        private to this process until save() is called.
+        """
+        with open(path, 'rb') as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        try:
+            if len(mapping) < FILE_HEADER_BYTES:
+                raise ValueError(f"Not a transposition table file: {path}")
+            magic, version, age, num_entries, side_key = FILE_HEADER.unpack_from(mapping)
+            if magic != FILE_MAGIC or version != FILE_VERSION:
+                raise ValueError(f"Not a transposition table file: {path}")
+            if side_key != ZOBRIST_SIDE_KEY:
+                raise ValueError(f"Transposition table file uses different Zobrist keys: {path}")
+            size = num_entries * ENTRY_BYTES
+            if len(mapping) != FILE_HEADER_BYTES + size or table_bytes(size / (1024 * 1024)) != size:
+                raise ValueError(f"Corrupt transposition table file: {path}")
+            table = cls(size / (1024 * 1024), buffer=memoryview(mapping)[FILE_HEADER_BYTES:])
+        except Exception:
+            mapping.close()
+            raise
+        table.age = age & AGE_MASK
+        table._mapping = mapping
+        return table
+
+    def reset_stats(self):
+        self.probes = 0
+        self.hits = 0
+        self.collisions = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    def clear(self):
+        """
+        Empties every slot and resets the age and the counters.
+        """
+        self.buffer[:] = bytes(len(self.buffer))
+        self.age = 0
+        self.reset_stats()
+
+    def new_search(self):
+        """
+        Starts a new search generation. Entries from older searches are
+        preferred for replacement but still answer probes.
+        """
+        self.age = (self.age + 1) & AGE_MASK
+
+    def probe(self, key):
+        """
+        Returns (value, depth, flag, move) for the position, or None.
+        """
+        self.probes += 1
+        key &= KEY_MASK
+        index = (key & self.bucket_mask) * BUCKET_SIZE
+        keys = self.keys
+        data = self.data
+        occupied = False
+        for slot in range(index, index + BUCKET_SIZE):
+            entry = data[slot]
+            if not entry:
+                continue
+            if keys[slot] ^ entry == key:
+                self.hits += 1
+                return unpack_entry(entry)
+            occupied = True
+        if occupied:
+            self.collisions += 1
+        return None
+
+    def store(self, key, value, depth, flag, move=0):
+        """
+        Stores a search result. An existing entry for the same position is
+        updated in place; otherwise an empty slot is used, and failing that
+        the slot with the lowest depth, where every search generation of
+        age counts as eight plies of depth.
+        """
+        self.stores += 1
+        key &= KEY_MASK
+        index = (key & self.bucket_mask) * BUCKET_SIZE
+        keys = self.keys
+        data = self.data
+        age = self.age
+        victim = index
+        victim_worth = None
+        for slot in range(index, index + BUCKET_SIZE):
+            entry = data[slot]
+            if not entry or keys[slot] ^ entry == key:
+                if entry and not move:
+                    # Keep the old best move when this result has none
+                    move = entry & MOVE_MASK
+                victim = slot
+                break
+            relative_age = (age - (entry >> AGE_SHIFT)) & AGE_MASK
+            worth = ((entry >> DEPTH_SHIFT) & DEPTH_MASK) - 8 * relative_age
+            if victim_worth is None or worth < victim_worth:
+                victim = slot
+                victim_worth = worth
+        else:
+            self.overwrites += 1
+
+        entry = pack_entry(value, depth, flag, move, age)
+        keys[victim] = key ^ entry
+        data[victim] = entry
+
+    def hashfull(self):
+        """
+        Permille of the first 1000 slots used by the current search.
+        """
+        sample = min(1000, self.num_entries)
+        used = sum(
+            1 for slot in range(sample)
+            if self.data[slot] and (self.data[slot] >> AGE_SHIFT) & AGE_MASK == self.age
+        )
+        return used * 1000 // sample
+
+    def stats(self):
+        return {
+            'size_mb': self.size_mb,
+            'entries': self.num_entries,
+            'probes': self.probes,
+            'hits': self.hits,
+            'collisions': self.collisions,
+            'stores': self.stores,
+            'overwrites': self.overwrites,
+            'hashfull': self.hashfull(),
+        }
@@ -1,43 +1,154 @@
-from src.core.constants import INITIAL_POSITIONS, FILE_MASKS
-import random
-import json
+from array import array
+from src.core.move import (
+    Move, PIECE_SYMBOLS, PIECE_CODES, CAPTURE_CODES, PROMOTION_CODES, CAPTURE_MASK, PROMOTION_MASK,
+    SQUARE_MASK, PIECE_MASK, TO_SHIFT, PIECE_SHIFT, CAPTURE_SHIFT, PROMOTION_SHIFT,
+    EN_PASSANT_FLAG, CASTLING_FLAG,
+)
+from src.core.constants import (
+    INITIAL_POSITIONS, FILE_MASKS, ALL_CASTLING_RIGHTS, CASTLING_SYMBOLS,
+    CASTLING_RIGHTS_UPDATE, CASTLING_ROOK_MOVES,
+    WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE,
+    KNIGHT_MOVES, KING_MOVES, WHITE_PAWN_ATTACKS, BLACK_PAWN_ATTACKS,
+    BETWEEN_SQUARES, LINE_SQUARES, FILE_A, FILE_H, RANK_1, RANK_3, RANK_6, RANK_8,
+    PIECE_VALUES, SEE_VALUES, ZOBRIST_PIECE_KEYS, ZOBRIST_CASTLING_KEYS, ZOBRIST_EN_PASSANT_KEYS, ZOBRIST_SIDE_KEY,
+    bishop_attacks, rook_attacks, queen_attacks,
+)
 from src.utils.utils import algebraic_to_square, square_to_algebraic
-from src.ml.predict_move import MovePredictor
 from src.Ai.minimax import find_best_move
 from src.Ai.evaluation import evaluate
 
+# Replacements that turn rows of '1' (empty squares) into FEN digits
+_EMPTY_RUNS = [('1' * count, str(count)) for count in range(8, 1, -1)]
+
+_default_move_predictor = None
+
+def get_default_move_predictor():
+    """
+    Loads the MovePredictor model on first use and shares it between boards.
+    """
+    global _default_move_predictor
+    if _default_move_predictor is None:
+        from src.ml.predict_move import MovePredictor
+        _default_move_predictor = MovePredictor()
+    return _default_move_predictor
+
 class Board:
-    def __init__(self):
+    zobrist_piece_keys = ZOBRIST_PIECE_KEYS
+    zobrist_castling_keys = ZOBRIST_CASTLING_KEYS
+    zobrist_en_passant_keys = ZOBRIST_EN_PASSANT_KEYS
+    zobrist_side_key = ZOBRIST_SIDE_KEY
+
+    def __init__(self, move_predictor=None):
+        """
+        move_predictor is optional; when omitted the shared default model is
+        loaded the first time a prediction is needed.
+        """
         self.bitboards = INITIAL_POSITIONS.copy()
         self.white_to_move = True
-        self.castling_rights = {'K': True, 'Q': True, 'k': True, 'q': True}
+        self.castling_rights = ALL_CASTLING_RIGHTS
         self.en_passant_target = None
         self.halfmove_clock = 0
         self.fullmove_number = 1
         self.move_history = []
 
         self.update_occupied()
+        self.update_mailbox()
+        self.zobrist_hash = self.compute_zobrist_hash()
+        self._check_info_hash = None
 
-        random.seed(0)
-        pieces = ['P', 'N', 'B', 'R', 'Q', 'K',
-                  'p', 'n', 'b', 'r', 'q', 'k']
+        self._move_predictor = move_predictor
 
-        self.zobrist_piece_keys = {
-            piece: [random.getrandbits(64) for _ in range(64)] for piece in pieces
-        }
+    @property
+    def move_predictor(self):
+        if self._move_predictor is None:
+            self._move_predictor = get_default_move_predictor()
+        return self._move_predictor
 
-        self.zobrist_castling_keys = {
-            'K': random.getrandbits(64),
-            'Q': random.getrandbits(64),
-            'k': random.getrandbits(64),
-            'q': random.getrandbits(64)
-        }
+    @move_predictor.setter
+    def move_predictor(self, move_predictor):
+        self._move_predictor = move_predictor
 
-        self.zobrist_en_passant_keys = [random.getrandbits(64) for _ in range(8)]
-        self.zobrist_side_key = random.getrandbits(64)
-        self.zobrist_hash = self.compute_zobrist_hash()
+    def copy(self):
+        """
+        Returns an independent board in the same position. Only the bitboards,
+        mailbox and state fields are cloned; the copy starts with an empty
+        move history and shares this board's move predictor.
+        """
+        board = Board.__new__(Board)
+        board.bitboards = self.bitboards.copy()
+        board.mailbox = self.mailbox[:]
+        board.occupied_white = self.occupied_white
+        board.occupied_black = self.occupied_black
+        board.occupied = self.occupied
+        board.white_to_move = self.white_to_move
+        board.castling_rights = self.castling_rights
+        board.en_passant_target = self.en_passant_target
+        board.halfmove_clock = self.halfmove_clock
+        board.fullmove_number = self.fullmove_number
+        board.zobrist_hash = self.zobrist_hash
+        board.move_history = []
+        board._check_info_hash = None
+        board._move_predictor = self._move_predictor
+        return board
+
+    @classmethod
+    def from_fen(cls, fen, move_predictor=None):
+        """
+        Creates a board in the position described by a FEN string, without
+        setting up the initial position first.
+        """
+        board = cls.__new__(cls)
+        board._move_predictor = move_predictor
+        board.set_fen(fen)
+        return board
 
-        self.move_predictor = MovePredictor()
+    def set_fen(self, fen):
+        """
+        Sets up the position described by a FEN string. Missing clock fields
+        default to 0 and 1.
+        """
+        fields = fen.split()
+        if not fields or fields[0].count('/') != 7:
+            raise ValueError(f"Invalid FEN: {fen}")
+        fields += ['w', '-', '-', '0', '1'][len(fields) - 1:]
+        if fields[1] not in ('w', 'b'):
+            raise ValueError(f"Invalid FEN: {fen}")
+
+        bitboards = {piece: 0 for piece in INITIAL_POSITIONS}
+        mailbox = [None] * 64
+        square = 56
+        try:
+            for char in fields[0]:
+                if char == '/':
+                    if square & 7:
+                        raise ValueError(f"Invalid FEN: {fen}")
+                    square -= 16
+                elif char in '12345678':
+                    square += int(char)
+                else:
+                    bitboards[char] |= 1 << square
+                    mailbox[square] = char
+                    square += 1
+        except (KeyError, IndexError):
+            raise ValueError(f"Invalid FEN: {fen}") from None
+        if square != 8:
+            raise ValueError(f"Invalid FEN: {fen}")
+
+        self.bitboards = bitboards
+        self.mailbox = mailbox
+        self.white_to_move = fields[1] == 'w'
+        self.castling_rights = 0
+        for right, symbol in CASTLING_SYMBOLS:
+            if symbol in fields[2]:
+                self.castling_rights |= right
+        self.en_passant_target = algebraic_to_square(fields[3]) if fields[3] != '-' else None
+        self.halfmove_clock = int(fields[4])
+        self.fullmove_number = int(fields[5])
+        self.move_history = []
+
+        self.update_occupied()
+        self.zobrist_hash = self.compute_zobrist_hash()
+        self._check_info_hash = None
 
     def compute_zobrist_hash(self):
         zobrist_hash = 0
@@ -46,9 +157,7 @@ class Board:
             for square in squares:
                 zobrist_hash ^= self.zobrist_piece_keys[piece][square]
 
-        for right in ['K', 'Q', 'k', 'q']:
-            if self.castling_rights.get(right, False):
-                zobrist_hash ^= self.zobrist_castling_keys[right]
+        zobrist_hash ^= self.zobrist_castling_keys[self.castling_rights]
 
         if self.en_passant_target is not None:
             zobrist_hash ^= self.zobrist_en_passant_keys[self.en_passant_target % 8]
@@ -77,162 +186,203 @@ class Board:
                 self.occupied_black |= bitboard
         self.occupied = self.occupied_white | self.occupied_black
 
-    def make_move(self, move, change_turn=True):
-        self.move_history.append({
-            'from_square': move.from_square,
-            'to_square': move.to_square,
-            'promoted_piece': move.promoted_piece if hasattr(move, 'promoted_piece') else None,
-            'captured_piece': move.captured_piece if hasattr(move, 'captured_piece') else None,
-            'is_en_passant': move.is_en_passant if hasattr(move, 'is_en_passant') else False,
-            'is_castling': move.is_castling if hasattr(move, 'is_castling') else False,
-            'bitboards': self.bitboards.copy(),
-            'white_to_move': self.white_to_move,
-            'castling_rights': self.castling_rights.copy(),
-            'en_passant_target': self.en_passant_target,
-            'halfmove_clock': self.halfmove_clock,
-            'fullmove_number': self.fullmove_number,
-            'zobrist_hash': self.zobrist_hash,
-        })
-
-        self.zobrist_hash ^= self.zobrist_side_key
-
-        piece = move.piece
-        from_square = move.from_square
-        to_square = move.to_square
-
-        self.bitboards[piece] &= ~(1 << from_square)
-        self.zobrist_hash ^= self.zobrist_piece_keys[piece][from_square]
-
-        captured_piece = self.get_piece_at_square(to_square) if self.is_square_occupied_by_opponent(to_square) else None
+    def update_mailbox(self):
+        self.mailbox = [None] * 64
+        for piece, bitboard in self.bitboards.items():
+            for square in self.get_squares_from_bitboard(bitboard):
+                self.mailbox[square] = piece
 
-        if captured_piece:
-            self.bitboards[captured_piece] &= ~(1 << to_square)
-            self.zobrist_hash ^= self.zobrist_piece_keys[captured_piece][to_square]
-            self.halfmove_clock = 0
-        else:
-            self.halfmove_clock += 1
+    def make_move(self, move, change_turn=True):
+        """
+        Applies a packed move (or Move view) in place. Only what cannot be
+        recomputed from the move itself is pushed onto move_history, as a
+        tuple of (move, captured piece, castling rights, en passant square,
+        halfmove clock, zobrist hash, change_turn).
+        """
+        from_square = move & SQUARE_MASK
+        to_square = (move >> TO_SHIFT) & SQUARE_MASK
+        piece = PIECE_SYMBOLS[(move >> PIECE_SHIFT) & PIECE_MASK]
+        promoted = (move >> PROMOTION_SHIFT) & PIECE_MASK
+        from_bit = 1 << from_square
+        to_bit = 1 << to_square
+        is_white = piece.isupper()
+        bitboards = self.bitboards
+        mailbox = self.mailbox
+        piece_keys = self.zobrist_piece_keys
+
+        enemy_occupied = self.occupied_black if is_white else self.occupied_white
+        captured_piece = mailbox[to_square]
+
+        self.move_history.append((
+            move, captured_piece, self.castling_rights, self.en_passant_target,
+            self.halfmove_clock, self.zobrist_hash, change_turn,
+        ))
 
-        if move.promoted_piece:
-            promoted_piece = move.promoted_piece
-            self.bitboards[promoted_piece] |= (1 << to_square)
-            self.zobrist_hash ^= self.zobrist_piece_keys[promoted_piece][to_square]
-        else:
-            self.bitboards[piece] |= (1 << to_square)
-            self.zobrist_hash ^= self.zobrist_piece_keys[piece][to_square]
-
-        if move.is_en_passant:
-            ep_capture_square = to_square + (8 if self.white_to_move else -8)
-            captured_pawn = 'p' if self.white_to_move else 'P'
-            self.bitboards[captured_pawn] &= ~(1 << ep_capture_square)
-            self.zobrist_hash ^= self.zobrist_piece_keys[captured_pawn][ep_capture_square]
-            captured_piece = captured_pawn
-            self.halfmove_clock = 0
+        zobrist_hash = self.zobrist_hash
+        bitboards[piece] ^= from_bit
+        zobrist_hash ^= piece_keys[piece][from_square]
 
-        if move.is_castling:
-            if to_square == 6:
-                self.bitboards['R'] &= ~(1 << 7)
-                self.bitboards['R'] |= (1 << 5)
-                self.zobrist_hash ^= self.zobrist_piece_keys['R'][7]
-                self.zobrist_hash ^= self.zobrist_piece_keys['R'][5]
-            elif to_square == 2:
-                self.bitboards['R'] &= ~(1 << 0)
-                self.bitboards['R'] |= (1 << 3)
-                self.zobrist_hash ^= self.zobrist_piece_keys['R'][0]
-                self.zobrist_hash ^= self.zobrist_piece_keys['R'][3]
-            elif to_square == 62:
-                # Black king-side castling
-                self.bitboards['r'] &= ~(1 << 63)
-                self.bitboards['r'] |= (1 << 61)
-                self.zobrist_hash ^= self.zobrist_piece_keys['r'][63]
-                self.zobrist_hash ^= self.zobrist_piece_keys['r'][61]
-            elif to_square == 58:
-                # Black queen-side castling
-                self.bitboards['r'] &= ~(1 << 56)
-                self.bitboards['r'] |= (1 << 59)
-                self.zobrist_hash ^= self.zobrist_piece_keys['r'][56]
-                self.zobrist_hash ^= self.zobrist_piece_keys['r'][59]
-
-        self.update_castling_rights(piece, from_square, to_square)
+        if captured_piece:
+            bitboards[captured_piece] ^= to_bit
+            zobrist_hash ^= piece_keys[captured_piece][to_square]
+            enemy_occupied ^= to_bit
+
+        placed_piece = PIECE_SYMBOLS[promoted - 1] if promoted else piece
+        bitboards[placed_piece] |= to_bit
+        zobrist_hash ^= piece_keys[placed_piece][to_square]
+        mailbox[from_square] = None
+        mailbox[to_square] = placed_piece
+        own_occupied = (self.occupied_white if is_white else self.occupied_black) ^ from_bit ^ to_bit
+
+        if move & EN_PASSANT_FLAG:
+            ep_capture_square = to_square - 8 if is_white else to_square + 8
+            captured_pawn = 'p' if is_white else 'P'
+            bitboards[captured_pawn] ^= 1 << ep_capture_square
+            mailbox[ep_capture_square] = None
+            zobrist_hash ^= piece_keys[captured_pawn][ep_capture_square]
+            enemy_occupied ^= 1 << ep_capture_square
+
+        if move & CASTLING_FLAG:
+            rook = 'R' if is_white else 'r'
+            rook_from, rook_to = CASTLING_ROOK_MOVES[to_square]
+            rook_bits = (1 << rook_from) | (1 << rook_to)
+            bitboards[rook] ^= rook_bits
+            mailbox[rook_from] = None
+            mailbox[rook_to] = rook
+            own_occupied ^= rook_bits
+            zobrist_hash ^= piece_keys[rook][rook_from] ^ piece_keys[rook][rook_to]
+
+        castling_rights = self.castling_rights & CASTLING_RIGHTS_UPDATE[from_square] & CASTLING_RIGHTS_UPDATE[to_square]
+        if castling_rights != self.castling_rights:
+            zobrist_hash ^= self.zobrist_castling_keys[self.castling_rights] ^ self.zobrist_castling_keys[castling_rights]
+            self.castling_rights = castling_rights
 
         if self.en_passant_target is not None:
-            self.zobrist_hash ^= self.zobrist_en_passant_keys[self.en_passant_target % 8]
+            zobrist_hash ^= self.zobrist_en_passant_keys[self.en_passant_target % 8]
             self.en_passant_target = None
 
-        if piece.upper() == 'P' and abs(to_square - from_square) == 16:
+        is_pawn = piece == 'P' or piece == 'p'
+        if is_pawn and abs(to_square - from_square) == 16:
             self.en_passant_target = (from_square + to_square) // 2
-            self.zobrist_hash ^= self.zobrist_en_passant_keys[self.en_passant_target % 8]
+            zobrist_hash ^= self.zobrist_en_passant_keys[self.en_passant_target % 8]
 
-        if piece.upper() == 'P' or captured_piece:
+        if is_pawn or captured_piece:
             self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
 
-        if not self.white_to_move:
+        if not is_white:
             self.fullmove_number += 1
 
-        self.update_occupied()
+        if is_white:
+            self.occupied_white = own_occupied
+            self.occupied_black = enemy_occupied
+        else:
+            self.occupied_black = own_occupied
+            self.occupied_white = enemy_occupied
+        self.occupied = own_occupied | enemy_occupied
 
         if change_turn:
             self.white_to_move = not self.white_to_move
+            zobrist_hash ^= self.zobrist_side_key
+        self.zobrist_hash = zobrist_hash
+
+    def make_null_move(self):
+        """
+        Passes the turn without moving a piece, for null-move pruning. The
+        en passant square is cleared and the side and en passant keys are
+        updated in the Zobrist hash. Recorded in move_history as move 0.
+        """
+        self.move_history.append((
+            0, None, self.castling_rights, self.en_passant_target,
+            self.halfmove_clock, self.zobrist_hash, True,
+        ))
+        zobrist_hash = self.zobrist_hash ^ self.zobrist_side_key
+        if self.en_passant_target is not None:
+            zobrist_hash ^= self.zobrist_en_passant_keys[self.en_passant_target % 8]
+            self.en_passant_target = None
+        self.halfmove_clock += 1
+        self.white_to_move = not self.white_to_move
+        self.zobrist_hash = zobrist_hash
 
-    def undo_move(self, move):
+    def undo_null_move(self):
+        self.undo_move()
+
+    def has_non_pawn_material(self, is_white):
+        """
+        True if the side has a knight, bishop, rook or queen. Positions
+        without one are where zugzwang makes passing unsound.
+        """
+        bitboards = self.bitboards
+        if is_white:
+            return bool(bitboards['N'] | bitboards['B'] | bitboards['R'] | bitboards['Q'])
+        return bool(bitboards['n'] | bitboards['b'] | bitboards['r'] | bitboards['q'])
+
+    def undo_move(self, move=None):
+        """
+        Reverses the last make_move by flipping the same bits back and
+        restoring the saved scalar state.
+        """
         if not self.move_history:
             return
-        state = self.move_history.pop()
-        self.bitboards = state['bitboards']
-        self.white_to_move = state['white_to_move']
-        self.castling_rights = state['castling_rights']
-        self.en_passant_target = state['en_passant_target']
-        self.halfmove_clock = state['halfmove_clock']
-        self.fullmove_number = state['fullmove_number']
-        self.zobrist_hash = state['zobrist_hash']
+        (move, captured_piece, self.castling_rights, self.en_passant_target,
+         self.halfmove_clock, self.zobrist_hash, change_turn) = self.move_history.pop()
 
-        self.update_occupied()
+        if change_turn:
+            self.white_to_move = not self.white_to_move
+        if not move:
+            # Null move: nothing but the restored state changed
+            return
+
+        from_square = move & SQUARE_MASK
+        to_square = (move >> TO_SHIFT) & SQUARE_MASK
+        piece = PIECE_SYMBOLS[(move >> PIECE_SHIFT) & PIECE_MASK]
+        promoted = (move >> PROMOTION_SHIFT) & PIECE_MASK
+        from_bit = 1 << from_square
+        to_bit = 1 << to_square
+        is_white = piece.isupper()
+        bitboards = self.bitboards
+        mailbox = self.mailbox
+
+        own_occupied = (self.occupied_white if is_white else self.occupied_black) ^ from_bit ^ to_bit
+        enemy_occupied = self.occupied_black if is_white else self.occupied_white
+
+        placed_piece = PIECE_SYMBOLS[promoted - 1] if promoted else piece
+        bitboards[placed_piece] ^= to_bit
+        bitboards[piece] |= from_bit
+        mailbox[from_square] = piece
+        mailbox[to_square] = captured_piece
 
-    def update_castling_rights(self, piece, from_square, to_square):
-        if piece == 'K':
-            if self.castling_rights['K']:
-                self.zobrist_hash ^= self.zobrist_castling_keys['K']
-            if self.castling_rights['Q']:
-                self.zobrist_hash ^= self.zobrist_castling_keys['Q']
-            self.castling_rights['K'] = False
-            self.castling_rights['Q'] = False
-        elif piece == 'k':
-            if self.castling_rights['k']:
-                self.zobrist_hash ^= self.zobrist_castling_keys['k']
-            if self.castling_rights['q']:
-                self.zobrist_hash ^= self.zobrist_castling_keys['q']
-            self.castling_rights['k'] = False
-            self.castling_rights['q'] = False
-        elif piece == 'R':
-            if from_square == 0 and self.castling_rights['Q']:
-                self.zobrist_hash ^= self.zobrist_castling_keys['Q']
-                self.castling_rights['Q'] = False
-            elif from_square == 7 and self.castling_rights['K']:
-                self.zobrist_hash ^= self.zobrist_castling_keys['K']
-                self.castling_rights['K'] = False
-        elif piece == 'r':
-            if from_square == 56 and self.castling_rights['q']:
-                self.zobrist_hash ^= self.zobrist_castling_keys['q']
-                self.castling_rights['q'] = False
-            elif from_square == 63 and self.castling_rights['k']:
-                self.zobrist_hash ^= self.zobrist_castling_keys['k']
-                self.castling_rights['k'] = False
-
-        if self.is_square_occupied_by_opponent(to_square):
-            captured_piece = self.get_piece_at_square(to_square)
-            if captured_piece == 'R':
-                if to_square == 0 and self.castling_rights['Q']:
-                    self.zobrist_hash ^= self.zobrist_castling_keys['Q']
-                    self.castling_rights['Q'] = False
-                elif to_square == 7 and self.castling_rights['K']:
-                    self.zobrist_hash ^= self.zobrist_castling_keys['K']
-                    self.castling_rights['K'] = False
-            elif captured_piece == 'r':
-                if to_square == 56 and self.castling_rights['q']:
-                    self.zobrist_hash ^= self.zobrist_castling_keys['q']
-                    self.castling_rights['q'] = False
-                elif to_square == 63 and self.castling_rights['k']:
-                    self.zobrist_hash ^= self.zobrist_castling_keys['k']
-                    self.castling_rights['k'] = False
+        if captured_piece:
+            bitboards[captured_piece] |= to_bit
+            enemy_occupied |= to_bit
+
+        if move & EN_PASSANT_FLAG:
+            ep_capture_square = to_square - 8 if is_white else to_square + 8
+            captured_pawn = 'p' if is_white else 'P'
+            bitboards[captured_pawn] |= 1 << ep_capture_square
+            mailbox[ep_capture_square] = captured_pawn
+            enemy_occupied |= 1 << ep_capture_square
+
+        if move & CASTLING_FLAG:
+            rook = 'R' if is_white else 'r'
+            rook_from, rook_to = CASTLING_ROOK_MOVES[to_square]
+            rook_bits = (1 << rook_from) | (1 << rook_to)
+            bitboards[rook] ^= rook_bits
+            mailbox[rook_from] = rook
+            mailbox[rook_to] = None
+            own_occupied ^= rook_bits
+
+        if not is_white:
+            self.fullmove_number -= 1
+
+        if is_white:
+            self.occupied_white = own_occupied
+            self.occupied_black = enemy_occupied
+        else:
+            self.occupied_black = own_occupied
+            self.occupied_white = enemy_occupied
+        self.occupied = own_occupied | enemy_occupied
 
     def is_square_occupied_by_opponent(self, square):
         if self.white_to_move:
@@ -274,27 +424,7 @@ class Board:
             return None
 
     def is_square_attacked(self, square, by_white):
-        if by_white:
-            for piece in 'PNBRQK':
-                bitboard = self.bitboards.get(piece, 0)
-                while bitboard:
-                    from_square = (bitboard & -bitboard).bit_length() - 1
-                    moves = self.generate_piece_moves(piece, from_square, attacks_only=True)
-                    for move in moves:
-                        if move.to_square == square:
-                            return True
-                    bitboard &= bitboard - 1
-        else:
-            for piece in 'pnbrqk':
-                bitboard = self.bitboards.get(piece, 0)
-                while bitboard:
-                    from_square = (bitboard & -bitboard).bit_length() - 1
-                    moves = self.generate_piece_moves(piece, from_square, attacks_only=True)
-                    for move in moves:
-                        if move.to_square == square:
-                            return True
-                    bitboard &= bitboard - 1
-        return False
+        return bool(self.attackers_to(square, by_white))
 
     def generate_piece_moves(self, piece, from_square, attacks_only=False):
         moves = []
@@ -314,8 +444,14 @@ class Board:
         return moves
 
     def generate_legal_moves(self, simulate=True, own=True):
-        
-        legal_moves = []
+        """
+        Returns the legal moves for the side to move. With simulate=False (or
+        own=False) the old pseudo-legal generation is used instead, which the
+        evaluation relies on for mobility and threat terms.
+        """
+        if simulate and own:
+            return self._generate_legal_moves()
+
         all_moves = []
         if own:
             pieces = 'PNBRQK' if self.white_to_move else 'pnbrqk'
@@ -329,18 +465,491 @@ class Board:
                 moves = self.generate_piece_moves(piece, from_square)
                 all_moves.extend(moves)
                 bitboard &= bitboard - 1
+        return all_moves
 
-        if simulate:
-            for move in all_moves:
-                self.make_move(move, change_turn=False)
-                if not self.is_in_check():
-                    legal_moves.append(move)
-                self.undo_move(move)
+    def attackers_to(self, square, by_white, occupied=None):
+        """
+        Returns a bitboard of the pieces of one colour that attack a square,
+        found by looking outward from the square with the attack tables.
+        """
+        if occupied is None:
+            occupied = self.occupied
+        bitboards = self.bitboards
+        if by_white:
+            pawns, knights, bishops, rooks, queens, king = (
+                bitboards['P'], bitboards['N'], bitboards['B'], bitboards['R'], bitboards['Q'], bitboards['K'])
+            pawn_attackers = BLACK_PAWN_ATTACKS[square] & pawns
         else:
-            legal_moves = all_moves
+            pawns, knights, bishops, rooks, queens, king = (
+                bitboards['p'], bitboards['n'], bitboards['b'], bitboards['r'], bitboards['q'], bitboards['k'])
+            pawn_attackers = WHITE_PAWN_ATTACKS[square] & pawns
+        return (
+            pawn_attackers |
+            (KNIGHT_MOVES[square] & knights) |
+            (KING_MOVES[square] & king) |
+            (bishop_attacks(square, occupied) & (bishops | queens)) |
+            (rook_attacks(square, occupied) & (rooks | queens))
+        )
 
-        return legal_moves
+    def slider_blockers(self, king_square, by_white):
+        """
+        Returns the pieces (of either colour) that stand alone between a king
+        and an enemy slider aiming at it. Those of the king's own colour are
+        pinned; those of the slider's colour can give discovered check.
+        """
+        bitboards = self.bitboards
+        if by_white:
+            diagonal = bitboards['B'] | bitboards['Q']
+            straight = bitboards['R'] | bitboards['Q']
+        else:
+            diagonal = bitboards['b'] | bitboards['q']
+            straight = bitboards['r'] | bitboards['q']
+        # Sliders on an open-board line with the king; the between check
+        # below keeps those with exactly one piece in the way.
+        snipers = (
+            (bishop_attacks(king_square, 0) & diagonal) |
+            (rook_attacks(king_square, 0) & straight)
+        )
+        blockers = 0
+        occupied = self.occupied
+        between_from_king = BETWEEN_SQUARES[king_square]
+        while snipers:
+            sniper_square = (snipers & -snipers).bit_length() - 1
+            between = between_from_king[sniper_square] & occupied
+            if between and not between & (between - 1):
+                blockers |= between
+            snipers &= snipers - 1
+        return blockers
+
+    def check_info(self):
+        """
+        Returns (enemy king square, check squares, discovered check candidates)
+        for the side to move, computed once per position. check_squares[i]
+        holds the squares from which piece type i ('PNBRQK' order) would
+        attack the enemy king; the candidates are our pieces that uncover a
+        slider's attack on it when they leave their line.
+        """
+        if self._check_info_hash == self.zobrist_hash:
+            return self._check_info
+        is_white = self.white_to_move
+        king_square = self.find_king_square(not is_white)
+        if king_square is None:
+            info = (None, (0, 0, 0, 0, 0, 0), 0)
+        else:
+            occupied = self.occupied
+            diagonal = bishop_attacks(king_square, occupied)
+            straight = rook_attacks(king_square, occupied)
+            pawn_squares = BLACK_PAWN_ATTACKS[king_square] if is_white else WHITE_PAWN_ATTACKS[king_square]
+            own = self.occupied_white if is_white else self.occupied_black
+            info = (
+                king_square,
+                (pawn_squares, KNIGHT_MOVES[king_square], diagonal, straight, diagonal | straight, 0),
+                self.slider_blockers(king_square, is_white) & own,
+            )
+        self._check_info = info
+        self._check_info_hash = self.zobrist_hash
+        return info
+
+    def gives_check(self, move):
+        """
+        Returns True if a legal move checks the enemy king. Ordinary moves are
+        answered from check_info(); only promotions, en passant and castling
+        look at the occupancy after the move.
+        """
+        king_square, check_squares, discovered = self.check_info()
+        if king_square is None:
+            return False
+        from_square = move & SQUARE_MASK
+        to_square = (move >> TO_SHIFT) & SQUARE_MASK
+        to_bit = 1 << to_square
+
+        if move & (PROMOTION_MASK | EN_PASSANT_FLAG | CASTLING_FLAG) == 0:
+            if check_squares[((move >> PIECE_SHIFT) & PIECE_MASK) % 6] & to_bit:
+                return True
+            return bool(discovered & (1 << from_square)) and not LINE_SQUARES[king_square][from_square] & to_bit
+
+        is_white = self.white_to_move
+        bitboards = self.bitboards
+        occupied = (self.occupied ^ (1 << from_square)) | to_bit
+        if move & CASTLING_FLAG:
+            rook_from, rook_to = CASTLING_ROOK_MOVES[to_square]
+            occupied = (occupied ^ (1 << rook_from)) | (1 << rook_to)
+            return bool(rook_attacks(rook_to, occupied) & (1 << king_square))
+        if move & PROMOTION_MASK:
+            promoted = ((move >> PROMOTION_SHIFT) & PIECE_MASK) - 1
+            if promoted % 6 == 1:
+                if KNIGHT_MOVES[to_square] & (1 << king_square):
+                    return True
+            else:
+                reach = 0
+                if promoted % 6 in (2, 4):
+                    reach |= bishop_attacks(to_square, occupied)
+                if promoted % 6 in (3, 4):
+                    reach |= rook_attacks(to_square, occupied)
+                if reach & (1 << king_square):
+                    return True
+            return bool(discovered & (1 << from_square)) and not LINE_SQUARES[king_square][from_square] & to_bit
+
+        # En passant: the captured pawn also leaves the board, which can
+        # open a line the from-square alone would not.
+        if check_squares[0] & to_bit:
+            return True
+        occupied ^= 1 << (to_square - 8 if is_white else to_square + 8)
+        if is_white:
+            diagonal = bitboards['B'] | bitboards['Q']
+            straight = bitboards['R'] | bitboards['Q']
+        else:
+            diagonal = bitboards['b'] | bitboards['q']
+            straight = bitboards['r'] | bitboards['q']
+        return bool(
+            (bishop_attacks(king_square, occupied) & diagonal) |
+            (rook_attacks(king_square, occupied) & straight)
+        )
+
+    def _least_valuable_attacker(self, attackers):
+        """
+        Returns (piece code % 6, bit) of the cheapest piece in attackers,
+        which must all be of one colour.
+        """
+        bitboards = self.bitboards
+        for index, piece in enumerate('PNBRQK' if attackers & self.occupied_white else 'pnbrqk'):
+            candidates = attackers & bitboards[piece]
+            if candidates:
+                return index, candidates & -candidates
+        return None, 0
+
+    def see(self, move):
+        """
+        Static exchange evaluation: the material balance for the side making
+        the move (normally the side to move) after the best sequence of
+        recaptures on the target square, cheapest attacker first. Sliders
+        behind a capturing piece (x-rays) join in as the square is opened
+        up. Pins are not considered.
+        """
+        if move & CASTLING_FLAG:
+            return 0
+        from_square = move & SQUARE_MASK
+        to_square = (move >> TO_SHIFT) & SQUARE_MASK
+        piece_index = ((move >> PIECE_SHIFT) & PIECE_MASK) % 6
+        captured = (move >> CAPTURE_SHIFT) & PIECE_MASK
+        promoted = (move >> PROMOTION_SHIFT) & PIECE_MASK
+        is_white = ((move >> PIECE_SHIFT) & PIECE_MASK) < 6
+        bitboards = self.bitboards
+
+        occupied = self.occupied ^ (1 << from_square)
+        if move & EN_PASSANT_FLAG:
+            occupied ^= 1 << (to_square - 8 if is_white else to_square + 8)
+        gains = [SEE_VALUES[(captured - 1) % 6] if captured else 0]
+        on_square = SEE_VALUES[piece_index]
+        if promoted:
+            on_square = SEE_VALUES[(promoted - 1) % 6]
+            gains[0] += on_square - SEE_VALUES[0]
+
+        diagonal = bitboards['B'] | bitboards['Q'] | bitboards['b'] | bitboards['q']
+        straight = bitboards['R'] | bitboards['Q'] | bitboards['r'] | bitboards['q']
+        attackers = (self.attackers_to(to_square, True, occupied) |
+                     self.attackers_to(to_square, False, occupied)) & occupied
+        side = self.occupied_black if is_white else self.occupied_white
+        other = self.occupied_white if is_white else self.occupied_black
+
+        while True:
+            side_attackers = attackers & side
+            if not side_attackers:
+                break
+            index, bit = self._least_valuable_attacker(side_attackers)
+            gains.append(on_square - gains[-1])
+            on_square = SEE_VALUES[index]
+            occupied ^= bit
+            if index in (0, 2, 4):
+                attackers |= bishop_attacks(to_square, occupied) & diagonal
+            if index in (3, 4):
+                attackers |= rook_attacks(to_square, occupied) & straight
+            attackers &= occupied
+            if index == 5 and attackers & other:
+                # The king cannot capture into a defended square
+                gains.pop()
+                break
+            side, other = other, side
+
+        while len(gains) > 1:
+            last = gains.pop()
+            gains[-1] = -max(-gains[-1], last)
+        return gains[0]
+
+    def see_ge(self, move, threshold=0):
+        """
+        True if see(move) >= threshold. Ordinary captures and quiet moves
+        stop as soon as the outcome is certain, without building the whole
+        exchange sequence.
+        """
+        if move & (CASTLING_FLAG | EN_PASSANT_FLAG | PROMOTION_MASK):
+            return self.see(move) >= threshold
+        from_square = move & SQUARE_MASK
+        to_square = (move >> TO_SHIFT) & SQUARE_MASK
+        captured = (move >> CAPTURE_SHIFT) & PIECE_MASK
+
+        swap = (SEE_VALUES[(captured - 1) % 6] if captured else 0) - threshold
+        if swap < 0:
+            return False
+        swap = SEE_VALUES[((move >> PIECE_SHIFT) & PIECE_MASK) % 6] - swap
+        if swap <= 0:
+            return True
+
+        bitboards = self.bitboards
+        occupied = self.occupied ^ (1 << from_square) ^ (1 << to_square)
+        diagonal = bitboards['B'] | bitboards['Q'] | bitboards['b'] | bitboards['q']
+        straight = bitboards['R'] | bitboards['Q'] | bitboards['r'] | bitboards['q']
+        attackers = (self.attackers_to(to_square, True, occupied) |
+                     self.attackers_to(to_square, False, occupied)) & occupied
+        is_white = ((move >> PIECE_SHIFT) & PIECE_MASK) < 6
+        side = self.occupied_black if is_white else self.occupied_white
+        other = self.occupied_white if is_white else self.occupied_black
+        result = True
+
+        while True:
+            attackers &= occupied
+            side_attackers = attackers & side
+            if not side_attackers:
+                break
+            result = not result
+            index, bit = self._least_valuable_attacker(side_attackers)
+            if index == 5:
+                # A king recapture only stands if the other side has nothing left
+                return not result if attackers & other else result
+            swap = SEE_VALUES[index] - swap
+            if swap < result:
+                break
+            occupied ^= bit
+            if index in (0, 2, 4):
+                attackers |= bishop_attacks(to_square, occupied) & diagonal
+            if index in (3, 4):
+                attackers |= rook_attacks(to_square, occupied) & straight
+            side, other = other, side
+        return result
+
+    def is_legal(self, move):
+        """
+        Checks a move that did not come from this position's generator, such
+        as a hash or killer move, without generating the full move list.
+        """
+        if not move:
+            return False
+        from_square = move & SQUARE_MASK
+        to_square = (move >> TO_SHIFT) & SQUARE_MASK
+        piece = PIECE_SYMBOLS[(move >> PIECE_SHIFT) & PIECE_MASK]
+        is_white = self.white_to_move
+        if self.mailbox[from_square] != piece or piece.isupper() != is_white:
+            return False
+        king_square = self.find_king_square(is_white)
+        if piece in 'Pp' or move & CASTLING_FLAG or king_square is None:
+            # Pawn moves and castling have enough special cases to just regenerate
+            return move in self._generate_legal_moves()
+        if move & (EN_PASSANT_FLAG | PROMOTION_MASK):
+            return False
 
+        to_bit = 1 << to_square
+        own = self.occupied_white if is_white else self.occupied_black
+        if own & to_bit or CAPTURE_CODES[self.mailbox[to_square]] != move & CAPTURE_MASK:
+            return False
+        if piece in 'Nn':
+            reach = KNIGHT_MOVES[from_square]
+        elif piece in 'Bb':
+            reach = bishop_attacks(from_square, self.occupied)
+        elif piece in 'Rr':
+            reach = rook_attacks(from_square, self.occupied)
+        elif piece in 'Qq':
+            reach = queen_attacks(from_square, self.occupied)
+        else:
+            reach = KING_MOVES[from_square]
+        if not reach & to_bit:
+            return False
+
+        if piece in 'Kk':
+            return not self.attackers_to(to_square, not is_white, self.occupied ^ (1 << from_square))
+        checkers = self.attackers_to(king_square, not is_white)
+        if checkers:
+            if checkers & (checkers - 1):
+                return False
+            if not (checkers | BETWEEN_SQUARES[king_square][checkers.bit_length() - 1]) & to_bit:
+                return False
+        if self.slider_blockers(king_square, not is_white) & (1 << from_square):
+            return bool(LINE_SQUARES[king_square][from_square] & to_bit)
+        return True
+
+    def generate_tactical_moves(self):
+        """
+        Legal captures and promotions only.
+        """
+        return self._generate_legal_moves(quiet=False)
+
+    def generate_quiet_moves(self):
+        """
+        Legal moves that neither capture nor promote, castling included.
+        """
+        return self._generate_legal_moves(tactical=False)
+
+    def _generate_legal_moves(self, tactical=True, quiet=True):
+        """
+        Generates fully legal moves, as packed integers in an array('I'),
+        without making them. Checkers and pinned pieces are computed once;
+        every non-king move is restricted to the check evasion mask and, for
+        pinned pieces, to the pin line. tactical/quiet select which of
+        captures-and-promotions and the remaining moves are produced.
+        """
+        moves = array('I')
+        is_white = self.white_to_move
+        king_square = self.find_king_square(is_white)
+        if king_square is None:
+            return array('I', self.generate_legal_moves(simulate=False))
+
+        bitboards = self.bitboards
+        mailbox = self.mailbox
+        occupied = self.occupied
+        own = self.occupied_white if is_white else self.occupied_black
+        enemy = self.occupied_black if is_white else self.occupied_white
+        king_code = (PIECE_CODES['K' if is_white else 'k'] << PIECE_SHIFT) | king_square
+        if not quiet:
+            stage_mask = enemy
+        elif not tactical:
+            stage_mask = ~occupied & 0xFFFFFFFFFFFFFFFF
+        else:
+            stage_mask = ~own & 0xFFFFFFFFFFFFFFFF
+
+        # King moves: the king is lifted off the board so sliders see through it
+        occupied_without_king = occupied ^ (1 << king_square)
+        targets = KING_MOVES[king_square] & stage_mask
+        while targets:
+            to_square = (targets & -targets).bit_length() - 1
+            if not self.attackers_to(to_square, not is_white, occupied_without_king):
+                moves.append(king_code | (to_square << TO_SHIFT) | CAPTURE_CODES[mailbox[to_square]])
+            targets &= targets - 1
+
+        checkers = self.attackers_to(king_square, not is_white)
+        if checkers & (checkers - 1):
+            # Double check: only the king can move
+            return moves
+
+        if checkers:
+            checker_square = checkers.bit_length() - 1
+            evasion_mask = checkers | BETWEEN_SQUARES[king_square][checker_square]
+        else:
+            evasion_mask = ~own & 0xFFFFFFFFFFFFFFFF
+            if quiet:
+                self._generate_legal_castling(moves, is_white, king_square)
+
+        pinned = self.slider_blockers(king_square, not is_white) & own
+        pin_lines = LINE_SQUARES[king_square]
+
+        for piece, attack_function in (
+            ('N' if is_white else 'n', None),
+            ('B' if is_white else 'b', bishop_attacks),
+            ('R' if is_white else 'r', rook_attacks),
+            ('Q' if is_white else 'q', queen_attacks),
+        ):
+            bitboard = bitboards[piece]
+            piece_code = PIECE_CODES[piece] << PIECE_SHIFT
+            while bitboard:
+                from_square = (bitboard & -bitboard).bit_length() - 1
+                bitboard &= bitboard - 1
+                if attack_function is None:
+                    if pinned & (1 << from_square):
+                        continue
+                    targets = KNIGHT_MOVES[from_square]
+                else:
+                    targets = attack_function(from_square, occupied)
+                    if pinned & (1 << from_square):
+                        targets &= pin_lines[from_square]
+                targets &= evasion_mask & stage_mask
+                from_code = piece_code | from_square
+                while targets:
+                    to_square = (targets & -targets).bit_length() - 1
+                    moves.append(from_code | (to_square << TO_SHIFT) | CAPTURE_CODES[mailbox[to_square]])
+                    targets &= targets - 1
+
+        self._generate_legal_pawn_moves(moves, is_white, king_square, evasion_mask, pinned, enemy, tactical, quiet)
+        return moves
+
+    def _generate_legal_pawn_moves(self, moves, is_white, king_square, evasion_mask, pinned, enemy,
+                                   tactical=True, quiet=True):
+        pawn = 'P' if is_white else 'p'
+        pawn_code = PIECE_CODES[pawn] << PIECE_SHIFT
+        promotion_codes = [PROMOTION_CODES[piece] for piece in ('QRBN' if is_white else 'qrbn')]
+        pawns = self.bitboards[pawn]
+        empty = ~self.occupied & 0xFFFFFFFFFFFFFFFF
+        mailbox = self.mailbox
+        pin_lines = LINE_SQUARES[king_square]
+
+        if is_white:
+            forward = 8
+            single = (pawns << 8) & empty
+            double = ((single & RANK_3) << 8) & empty
+            left = ((pawns & ~FILE_A) << 7) & enemy
+            right = ((pawns & ~FILE_H) << 9) & enemy
+            promotion_rank = RANK_8
+        else:
+            forward = -8
+            single = (pawns >> 8) & empty
+            double = ((single & RANK_6) >> 8) & empty
+            left = ((pawns & ~FILE_A) >> 9) & enemy
+            right = ((pawns & ~FILE_H) >> 7) & enemy
+            promotion_rank = RANK_1
+
+        groups = []
+        if tactical:
+            groups += [
+                (single & promotion_rank & evasion_mask, forward),
+                (left & evasion_mask, forward - 1),
+                (right & evasion_mask, forward + 1),
+            ]
+        if quiet:
+            groups += [
+                (single & ~promotion_rank & evasion_mask, forward),
+                (double & evasion_mask, 2 * forward),
+            ]
+
+        for targets, offset in groups:
+            while targets:
+                to_square = (targets & -targets).bit_length() - 1
+                targets &= targets - 1
+                from_square = to_square - offset
+                if pinned & (1 << from_square) and not pin_lines[from_square] & (1 << to_square):
+                    continue
+                code = pawn_code | from_square | (to_square << TO_SHIFT) | CAPTURE_CODES[mailbox[to_square]]
+                if (1 << to_square) & promotion_rank:
+                    for promotion_code in promotion_codes:
+                        moves.append(code | promotion_code)
+                else:
+                    moves.append(code)
+
+        ep_square = self.en_passant_target
+        if ep_square is not None and tactical:
+            captured_square = ep_square - forward
+            ep_code = pawn_code | (ep_square << TO_SHIFT) | CAPTURE_CODES['p' if is_white else 'P'] | EN_PASSANT_FLAG
+            attackers = (BLACK_PAWN_ATTACKS[ep_square] if is_white else WHITE_PAWN_ATTACKS[ep_square]) & pawns
+            while attackers:
+                from_square = (attackers & -attackers).bit_length() - 1
+                attackers &= attackers - 1
+                # Two pawns leave the board at once, so test the resulting
+                # position directly; this also covers pins and evasions.
+                occupied = self.occupied ^ (1 << from_square) ^ (1 << captured_square) ^ (1 << ep_square)
+                if self.attackers_to(king_square, not is_white, occupied) & ~(1 << captured_square):
+                    continue
+                moves.append(ep_code | from_square)
+
+    def _generate_legal_castling(self, moves, is_white, king_square):
+        occupied = self.occupied
+        if is_white:
+            rights = ((WHITE_KINGSIDE, 6, 0x60, (5, 6)), (WHITE_QUEENSIDE, 2, 0x0E, (3, 2)))
+            king_code = PIECE_CODES['K'] << PIECE_SHIFT
+        else:
+            rights = ((BLACK_KINGSIDE, 62, 0x60 << 56, (61, 62)), (BLACK_QUEENSIDE, 58, 0x0E << 56, (59, 58)))
+            king_code = PIECE_CODES['k'] << PIECE_SHIFT
+        for right, to_square, empty_mask, king_path in rights:
+            if not self.castling_rights & right or occupied & empty_mask:
+                continue
+            if any(self.attackers_to(square, not is_white) for square in king_path):
+                continue
+            moves.append(king_code | king_square | (to_square << TO_SHIFT) | CASTLING_FLAG)
 
     def _generate_pawn_moves(self, piece, from_square, attacks_only=False):
         moves = []
@@ -357,7 +966,7 @@ class Board:
                 is_en_passant = (to_square == self.en_passant_target)
                 if (enemy_pieces & (1 << to_square)) or is_en_passant:
                     captured_piece = (
-                        self.get_piece_at_square(to_square)
+                        self.mailbox[to_square]
                         if enemy_pieces & (1 << to_square)
                         else ('p' if piece.isupper() else 'P')
                     )
@@ -415,66 +1024,32 @@ class Board:
                 to_file = to_square % 8
                 if abs(from_file - to_file) in [1, 2]:
                     if not (own_pieces & (1 << to_square)):
-                        moves.append(Move(piece, from_square, to_square))
+                        moves.append(Move(piece, from_square, to_square, captured_piece=self.mailbox[to_square]))
         return moves
 
     def _generate_bishop_moves(self, piece, from_square, attacks_only=False):
-        moves = []
-        own_pieces = self.occupied_white if piece.isupper() else self.occupied_black
-        directions = [9, 7, -7, -9]
-
-        for direction in directions:
-            to_square = from_square
-            while True:
-                to_square += direction
-                if 0 <= to_square < 64:
-                    from_rank = from_square // 8
-                    from_file = from_square % 8
-                    to_rank = to_square // 8
-                    to_file = to_square % 8
-                    if abs(to_rank - from_rank) != abs(to_file - from_file):
-                        break
-                    if own_pieces & (1 << to_square):
-                        if attacks_only:
-                            moves.append(Move(piece, from_square, to_square))
-                        break
-                    moves.append(Move(piece, from_square, to_square))
-                    if self.occupied & (1 << to_square):
-                        break
-                else:
-                    break
-        return moves
+        attacks = bishop_attacks(from_square, self.occupied)
+        return self._moves_from_attacks(piece, from_square, attacks, attacks_only)
 
     def _generate_rook_moves(self, piece, from_square, attacks_only=False):
-        moves = []
-        own_pieces = self.occupied_white if piece.isupper() else self.occupied_black
-        directions = [8, -8, 1, -1]
-
-        for direction in directions:
-            to_square = from_square
-            while True:
-                to_square += direction
-                if 0 <= to_square < 64:
-                    if direction in [1, -1]:
-                        from_rank = from_square // 8
-                        to_rank = to_square // 8
-                        if from_rank != to_rank:
-                            break
-                    if own_pieces & (1 << to_square):
-                        if attacks_only:
-                            moves.append(Move(piece, from_square, to_square))
-                        break
-                    moves.append(Move(piece, from_square, to_square))
-                    if self.occupied & (1 << to_square):
-                        break
-                else:
-                    break
-        return moves
+        attacks = rook_attacks(from_square, self.occupied)
+        return self._moves_from_attacks(piece, from_square, attacks, attacks_only)
 
     def _generate_queen_moves(self, piece, from_square, attacks_only=False):
+        attacks = queen_attacks(from_square, self.occupied)
+        return self._moves_from_attacks(piece, from_square, attacks, attacks_only)
+
+    def _moves_from_attacks(self, piece, from_square, attacks, attacks_only=False):
+        own_pieces = self.occupied_white if piece.isupper() else self.occupied_black
+        if not attacks_only:
+            attacks &= ~own_pieces
         moves = []
-        moves.extend(self._generate_bishop_moves(piece, from_square, attacks_only))
-        moves.extend(self._generate_rook_moves(piece, from_square, attacks_only))
+        while attacks:
+            to_square = (attacks & -attacks).bit_length() - 1
+            # Squares of own pieces (attacks_only) are defended, not captured
+            captured_piece = None if own_pieces & (1 << to_square) else self.mailbox[to_square]
+            moves.append(Move(piece, from_square, to_square, captured_piece=captured_piece))
+            attacks &= attacks - 1
         return moves
 
     def _generate_king_moves(self, piece, from_square, attacks_only=False):
@@ -489,7 +1064,7 @@ class Board:
                 to_file = to_square % 8
                 if abs(from_file - to_file) <= 1:
                     if not (own_pieces & (1 << to_square)):
-                        moves.append(Move(piece, from_square, to_square))
+                        moves.append(Move(piece, from_square, to_square, captured_piece=self.mailbox[to_square]))
         if not attacks_only:
             moves.extend(self._generate_castling_moves(piece, from_square))
         return moves
@@ -498,155 +1073,92 @@ class Board:
         moves = []
         if self.is_in_check():
             return moves
-        if piece.isupper():
-            king_side = self.castling_rights.get('K', False)
-            queen_side = self.castling_rights.get('Q', False)
-            enemy_attacks = self.get_all_attacked_squares(not self.white_to_move)
-            if king_side:
-                if not self.occupied & (1 << 5) and not self.occupied & (1 << 6):
-                    if not any(sq in enemy_attacks for sq in [4, 5, 6]):
-                        moves.append(Move(piece, from_square, 6, is_castling=True))
-            if queen_side:
-                if not self.occupied & (1 << 1) and not self.occupied & (1 << 2) and not self.occupied & (1 << 3):
-                    if not any(sq in enemy_attacks for sq in [2, 3, 4]):
-                        moves.append(Move(piece, from_square, 2, is_castling=True))
-        else:
-            king_side = self.castling_rights.get('k', False)
-            queen_side = self.castling_rights.get('q', False)
-            enemy_attacks = self.get_all_attacked_squares(not self.white_to_move)
-            if king_side:
-                if not self.occupied & (1 << 61) and not self.occupied & (1 << 62):
-                    if not any(sq in enemy_attacks for sq in [60, 61, 62]):
-                        moves.append(Move(piece, from_square, 62, is_castling=True))
-            if queen_side:
-                if not self.occupied & (1 << 57) and not self.occupied & (1 << 58) and not self.occupied & (1 << 59):
-                    if not any(sq in enemy_attacks for sq in [58, 59, 60]):
-                        moves.append(Move(piece, from_square, 58, is_castling=True))
-        return moves
+        is_white = piece.isupper()
+        king_square = self.find_king_square(is_white)
+        self._generate_legal_castling(moves, is_white, king_square)
+        return [Move.from_code(code) for code in moves]
 
-    def get_all_attacked_squares(self, by_white):
-        attacked_squares = set()
+    def get_attack_map(self, by_white):
+        """
+        Returns a bitboard of every square attacked by one colour.
+        """
+        occupied = self.occupied
+        bitboards = self.bitboards
         if by_white:
-            for piece in 'PNBRQK':
-                bitboard = self.bitboards.get(piece, 0)
-                while bitboard:
-                    from_square = (bitboard & -bitboard).bit_length() - 1
-                    moves = self.generate_piece_moves(piece, from_square, attacks_only=True)
-                    for move in moves:
-                        attacked_squares.add(move.to_square)
-                    bitboard &= bitboard - 1
+            pawns = bitboards['P']
+            attacks = ((pawns & ~FILE_A) << 7) | ((pawns & ~FILE_H) << 9)
+            pieces = 'NBRQK'
         else:
-            for piece in 'pnbrqk':
-                bitboard = self.bitboards.get(piece, 0)
-                while bitboard:
-                    from_square = (bitboard & -bitboard).bit_length() - 1
-                    moves = self.generate_piece_moves(piece, from_square, attacks_only=True)
-                    for move in moves:
-                        attacked_squares.add(move.to_square)
-                    bitboard &= bitboard - 1
-        return attacked_squares
+            pawns = bitboards['p']
+            attacks = ((pawns & ~FILE_A) >> 9) | ((pawns & ~FILE_H) >> 7)
+            pieces = 'nbrqk'
+        knight, bishop, rook, queen, king = pieces
+        for piece, attack_table, attack_function in (
+            (knight, KNIGHT_MOVES, None),
+            (king, KING_MOVES, None),
+            (bishop, None, bishop_attacks),
+            (rook, None, rook_attacks),
+            (queen, None, queen_attacks),
+        ):
+            bitboard = bitboards[piece]
+            while bitboard:
+                square = (bitboard & -bitboard).bit_length() - 1
+                if attack_table is not None:
+                    attacks |= attack_table[square]
+                else:
+                    attacks |= attack_function(square, occupied)
+                bitboard &= bitboard - 1
+        return attacks & 0xFFFFFFFFFFFFFFFF
+
+    def get_all_attacked_squares(self, by_white):
+        return set(self.get_squares_from_bitboard(self.get_attack_map(by_white)))
 
     def get_piece_at_square(self, square):
-        for piece, bitboard in self.bitboards.items():
-            if bitboard & (1 << square):
-                return piece
-        return None
+        return self.mailbox[square]
 
     def is_capture_move(self, move):
-        return move.captured_piece is not None
+        return bool(move & CAPTURE_MASK)
 
     def generate_capture_moves(self):
-        capture_moves = []
-        all_moves = self.generate_legal_moves()
-        for move in all_moves:
-            if self.is_capture_move(move):
-                capture_moves.append(move)
-        return capture_moves
+        """
+        Legal captures, without the quiet moves or non-capturing promotions.
+        """
+        return array('I', [move for move in self._generate_legal_moves(quiet=False) if move & CAPTURE_MASK])
 
     def get_piece_value(self, piece):
-        piece_values = {
-            'P': 100, 'N': 320, 'B': 330, 'R': 500, 'Q': 900, 'K': 20000,
-            'p': 100, 'n': 320, 'b': 330, 'r': 500, 'q': 900, 'k': 20000
-        }
-        return piece_values.get(piece, 0)
-
-    def update_zobrist_hash(self, move, undo=False):
-        piece = move.piece
-        from_square = move.from_square
-        to_square = move.to_square
-        captured_piece = move.captured_piece
-
-        if not undo:
-            self.zobrist_hash ^= self.zobrist_piece_keys[piece][from_square]
-            self.zobrist_hash ^= self.zobrist_piece_keys[piece][to_square]
-            if captured_piece:
-                self.zobrist_hash ^= self.zobrist_piece_keys[captured_piece][to_square]
-        else:
-            if captured_piece:
-                self.zobrist_hash ^= self.zobrist_piece_keys[captured_piece][to_square]
-            self.zobrist_hash ^= self.zobrist_piece_keys[piece][to_square]
-            self.zobrist_hash ^= self.zobrist_piece_keys[piece][from_square]
+        return abs(PIECE_VALUES.get(piece, 0))
+
+    def to_fen(self):
+        """
+        Returns the FEN string of the current position. Empty squares are
+        written as '1' and the runs collapsed afterwards, which keeps the
+        work in string methods instead of a per-square loop.
+        """
+        symbols = [piece or '1' for piece in self.mailbox]
+        placement = '/'.join([''.join(symbols[rank:rank + 8]) for rank in range(56, -8, -8)])
+        for run in _EMPTY_RUNS:
+            placement = placement.replace(*run)
+
+        castling = ''.join([symbol for right, symbol in CASTLING_SYMBOLS if self.castling_rights & right])
+        en_passant = square_to_algebraic(self.en_passant_target) if self.en_passant_target is not None else '-'
+        return (f"{placement} {'w' if self.white_to_move else 'b'} {castling or '-'} "
+                f"{en_passant} {self.halfmove_clock} {self.fullmove_number}")
 
     def generate_fen(self):
-        fen = ""
-        for rank in range(7, -1, -1):
-            empty = 0
-            for file in range(8):
-                square = rank * 8 + file
-                piece = self.get_piece_at_square(square)
-                if piece:
-                    if empty > 0:
-                        fen += str(empty)
-                        empty = 0
-                    fen += piece
-                else:
-                    empty += 1
-            if empty > 0:
-                fen += str(empty)
-            if rank != 0:
-                fen += '/'
-        fen += ' ' + ('w' if self.white_to_move else 'b')
-        castling = ''
-        for c in ['K', 'Q', 'k', 'q']:
-            if self.castling_rights.get(c, False):
-                castling += c
-        fen += ' ' + (castling if castling else '-')
-        fen += ' ' + (square_to_algebraic(self.en_passant_target) if self.en_passant_target is not None else '-')
-        fen += f' {self.halfmove_clock}'
-        fen += f' {self.fullmove_number}'
-
-        print(f"Generated FEN: {fen}")
-        return fen
+        return self.to_fen()
 
     def uci_to_move(self, uci_move):
         """
         Converts a UCI move string to a Move object.
         """
-        from_sq = algebraic_to_square(uci_move[:2])
-        to_sq = algebraic_to_square(uci_move[2:4])
-        promoted_piece = uci_move[4] if len(uci_move) > 4 else None
-        piece = self.get_piece_at_square(from_sq)
-        captured_piece = self.get_piece_at_square(to_sq)
-        is_castling = False
-        is_en_passant = False
-
-        if piece.upper() == 'K' and abs(to_sq - from_sq) == 2:
-            is_castling = True
-
-        if piece.upper() == 'P' and to_sq == self.en_passant_target:
-            is_en_passant = True
-            captured_piece = 'p' if self.white_to_move else 'P'
-
-        move = Move(
-            piece=piece,
-            from_square=from_sq,
-            to_square=to_sq,
-            captured_piece=captured_piece,
-            promoted_piece=promoted_piece.upper() if promoted_piece else None,
-            is_en_passant=is_en_passant,
-            is_castling=is_castling
-        )
-        return move
+        return Move.from_uci(self, uci_move)
+
+    def legal_moves(self):
+        """
+        Returns the legal moves as Move views, for the GUI and ML code that
+        read move attributes. The search works on generate_legal_moves().
+        """
+        return [Move.from_code(code) for code in self.generate_legal_moves()]
 
     def suggest_move(self):
         """
@@ -656,10 +1168,9 @@ class Board:
         Returns:
             Move or None: The best move found.
         """
-        fen = self.generate_fen()
-        legal_moves = self.generate_legal_moves()
+        legal_moves = self.legal_moves()
 
-        predicted_move_str = self.move_predictor.predict_move(fen, legal_moves)
+        predicted_move_str = self.move_predictor.predict_move(self, legal_moves)
         if predicted_move_str:
             move = self.uci_to_move(predicted_move_str)
             if move and move in legal_moves:
@@ -679,56 +1190,3 @@ class Board:
 
     def evaluate_board(self):
         return evaluate(self)
-
-class Move:
-    def __init__(
-        self,
-        piece,
-        from_square,
-        to_square,
-        captured_piece=None,
-        promoted_piece=None,
-        is_en_passant=False,
-        is_castling=False,
-    ):
-        self.piece = piece
-        self.from_square = from_square
-        self.to_square = to_square
-        self.captured_piece = captured_piece
-        self.promoted_piece = promoted_piece
-        self.is_en_passant = is_en_passant
-        self.is_castling = is_castling
-        self.is_check = False
-
-    def __eq__(self, other):
-        return (
-            isinstance(other, Move) and
-            self.piece == other.piece and
-            self.from_square == other.from_square and
-            self.to_square == other.to_square and
-            self.captured_piece == other.captured_piece and
-            self.promoted_piece == other.promoted_piece and
-            self.is_en_passant == other.is_en_passant and
-            self.is_castling == other.is_castling
-        )
-
-    def __hash__(self):
-        return hash((
-            self.piece,
-            self.from_square,
-            self.to_square,
-            self.promoted_piece,
-            self.is_en_passant,
-            self.is_castling,
-        ))
-
-    def __repr__(self):
-        move_str = f"{square_to_algebraic(self.from_square)}{square_to_algebraic(self.to_square)}"
-        if self.promoted_piece:
-            move_str += f"={self.promoted_piece}"
-        if self.is_castling:
-            if self.to_square in [6, 62]:
-                move_str = "O-O"
-            elif self.to_square in [2, 58]:
-                move_str = "O-O-O"
-        return move_str
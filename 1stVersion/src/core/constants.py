@@ -1,3 +1,5 @@
+import random
+
 PIECE_VALUES = {
     'P': 100,  # White Pawn
     'N': 320,  # White Knight
@@ -13,6 +15,9 @@ PIECE_VALUES = {
     'k': -20000,  # Black King
 }
 
+# Exchange values indexed by piece code % 6 ('PNBRQK' order), for SEE
+SEE_VALUES = (100, 320, 330, 500, 900, 20000)
+
 INITIAL_POSITIONS = {
     'P': 0x000000000000FF00,
     'N': 0x0000000000000042,
@@ -82,6 +87,38 @@ RANK_6 = RANK_MASKS[5]
 RANK_7 = RANK_MASKS[6]
 RANK_8 = RANK_MASKS[7]
 
+WHITE_KINGSIDE = 1
+WHITE_QUEENSIDE = 2
+BLACK_KINGSIDE = 4
+BLACK_QUEENSIDE = 8
+ALL_CASTLING_RIGHTS = WHITE_KINGSIDE | WHITE_QUEENSIDE | BLACK_KINGSIDE | BLACK_QUEENSIDE
+
+CASTLING_SYMBOLS = [
+    (WHITE_KINGSIDE, 'K'),
+    (WHITE_QUEENSIDE, 'Q'),
+    (BLACK_KINGSIDE, 'k'),
+    (BLACK_QUEENSIDE, 'q'),
+]
+
+# Castling rights that survive a move touching a square (from or to): moving
+# a king or rook, or capturing a rook on its home square, clears the matching
+# rights with a single AND.
+CASTLING_RIGHTS_UPDATE = [ALL_CASTLING_RIGHTS] * 64
+CASTLING_RIGHTS_UPDATE[0] &= ~WHITE_QUEENSIDE
+CASTLING_RIGHTS_UPDATE[4] &= ~(WHITE_KINGSIDE | WHITE_QUEENSIDE)
+CASTLING_RIGHTS_UPDATE[7] &= ~WHITE_KINGSIDE
+CASTLING_RIGHTS_UPDATE[56] &= ~BLACK_QUEENSIDE
+CASTLING_RIGHTS_UPDATE[60] &= ~(BLACK_KINGSIDE | BLACK_QUEENSIDE)
+CASTLING_RIGHTS_UPDATE[63] &= ~BLACK_KINGSIDE
+
+# King destination square -> (rook from square, rook to square)
+CASTLING_ROOK_MOVES = {
+    6: (7, 5),
+    2: (0, 3),
+    62: (63, 61),
+    58: (56, 59),
+}
+
 KNIGHT_MOVES = [0] * 64
 KING_MOVES = [0] * 64
 
@@ -112,33 +149,139 @@ def initialize_move_masks():
 
 initialize_move_masks()
 
-SLIDING_DIRECTIONS = {
-    'bishop': [9, 7, -7, -9],
-    'rook': [8, -8, 1, -1],
-    'queen': [9, 7, -7, -9, 8, -8, 1, -1]
-}
+WHITE_PAWN_ATTACKS = [0] * 64
+BLACK_PAWN_ATTACKS = [0] * 64
+
+def initialize_pawn_attacks():
+    for square in range(64):
+        rank = square // 8
+        file = square % 8
+        for df in (-1, 1):
+            f = file + df
+            if not 0 <= f < 8:
+                continue
+            if rank < 7:
+                WHITE_PAWN_ATTACKS[square] |= 1 << ((rank + 1) * 8 + f)
+            if rank > 0:
+                BLACK_PAWN_ATTACKS[square] |= 1 << ((rank - 1) * 8 + f)
+
+initialize_pawn_attacks()
 
-SQUARES = {square: {'neighbors': {}} for square in range(64)}
+ROOK_DIRECTIONS = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+BISHOP_DIRECTIONS = [(1, 1), (-1, -1), (1, -1), (-1, 1)]
 
-for square in range(64):
-    rank = square // 8
-    file = square % 8
+# Relevant-occupancy masks and attack tables for sliding pieces. The masked
+# occupancy (board.occupied & MASKS[square]) is a perfect key for the attack
+# table of that square, so a lookup is a single AND plus one dict access.
+ROOK_MASKS = [0] * 64
+BISHOP_MASKS = [0] * 64
+ROOK_ATTACKS = [None] * 64
+BISHOP_ATTACKS = [None] * 64
 
-    for piece_type, directions in SLIDING_DIRECTIONS.items():
-        for direction in directions:
-            neighbor_square = square + direction
+def _ray(square, dr, df):
+    squares = []
+    r = square // 8 + dr
+    f = square % 8 + df
+    while 0 <= r < 8 and 0 <= f < 8:
+        squares.append(r * 8 + f)
+        r += dr
+        f += df
+    return squares
 
-            dr = direction // 8
-            df = direction % 8
+def _line_attacks(square, directions):
+    """
+    Builds {masked occupancy: attacks} for the two opposite rays of one line.
+    The edge square of each ray never blocks anything, so it is left out of
+    the mask.
+    """
+    rays = [_ray(square, dr, df) for dr, df in directions]
+    line_mask = 0
+    for ray in rays:
+        for sq in ray[:-1]:
+            line_mask |= 1 << sq
 
-            if direction < 0:
-                dr = (direction // 8)
-                df = (direction % 8)
+    table = {}
+    subset = 0
+    while True:
+        attacks = 0
+        for ray in rays:
+            for sq in ray:
+                attacks |= 1 << sq
+                if subset & (1 << sq):
+                    break
+        table[subset] = attacks
+        subset = (subset - line_mask) & line_mask
+        if not subset:
+            break
+    return line_mask, table
+
+def _slider_table(square, directions):
+    """
+    Combines the attack tables of the two lines through a square. Rooks use the
+    rank and the file, bishops the diagonal and the anti-diagonal.
+    """
+    mask_a, table_a = _line_attacks(square, directions[0:2])
+    mask_b, table_b = _line_attacks(square, directions[2:4])
+    table = {}
+    for occ_a, attacks_a in table_a.items():
+        for occ_b, attacks_b in table_b.items():
+            table[occ_a | occ_b] = attacks_a | attacks_b
+    return mask_a | mask_b, table
+
+def initialize_sliding_attacks():
+    for square in range(64):
+        ROOK_MASKS[square], ROOK_ATTACKS[square] = _slider_table(square, ROOK_DIRECTIONS)
+        BISHOP_MASKS[square], BISHOP_ATTACKS[square] = _slider_table(square, BISHOP_DIRECTIONS)
+
+initialize_sliding_attacks()
+
+def rook_attacks(square, occupied):
+    return ROOK_ATTACKS[square][occupied & ROOK_MASKS[square]]
+
+def bishop_attacks(square, occupied):
+    return BISHOP_ATTACKS[square][occupied & BISHOP_MASKS[square]]
+
+def queen_attacks(square, occupied):
+    return (ROOK_ATTACKS[square][occupied & ROOK_MASKS[square]] |
+            BISHOP_ATTACKS[square][occupied & BISHOP_MASKS[square]])
+
+# BETWEEN_SQUARES[a][b]: squares strictly between a and b when they share a
+# rank, file or diagonal. LINE_SQUARES[a][b]: the whole board line through
+# both squares. Both are 0 for unaligned pairs.
+BETWEEN_SQUARES = [[0] * 64 for _ in range(64)]
+LINE_SQUARES = [[0] * 64 for _ in range(64)]
+
+def initialize_lines():
+    for square in range(64):
+        for dr, df in ROOK_DIRECTIONS + BISHOP_DIRECTIONS:
+            ray = _ray(square, dr, df)
+            line = 1 << square
+            for sq in ray + _ray(square, -dr, -df):
+                line |= 1 << sq
+            between = 0
+            for sq in ray:
+                BETWEEN_SQUARES[square][sq] = between
+                LINE_SQUARES[square][sq] = line
+                between |= 1 << sq
+
+initialize_lines()
+
+# Zobrist keys, shared by every Board. A private generator seeded with 0 keeps
+# the keys stable between runs without touching the global random state.
+_zobrist_random = random.Random(0)
+
+ZOBRIST_PIECE_KEYS = {
+    piece: [_zobrist_random.getrandbits(64) for _ in range(64)]
+    for piece in ['P', 'N', 'B', 'R', 'Q', 'K', 'p', 'n', 'b', 'r', 'q', 'k']
+}
 
-            new_rank = rank + (dr if dr < 0 else dr)
-            new_file = file + (df if df < 0 else df)
+# One key per castling-rights mask, so a rights change is a single XOR
+_castling_keys = [_zobrist_random.getrandbits(64) for _ in range(4)]
+ZOBRIST_CASTLING_KEYS = [0] * 16
+for _rights in range(16):
+    for _bit in range(4):
+        if _rights & (1 << _bit):
+            ZOBRIST_CASTLING_KEYS[_rights] ^= _castling_keys[_bit]
 
-            if 0 <= new_rank < 8 and 0 <= new_file < 8:
-                SQUARES[square]['neighbors'][direction] = new_rank * 8 + new_file
-            else:
-                SQUARES[square]['neighbors'][direction] = None
+ZOBRIST_EN_PASSANT_KEYS = [_zobrist_random.getrandbits(64) for _ in range(8)]
+ZOBRIST_SIDE_KEY = _zobrist_random.getrandbits(64)
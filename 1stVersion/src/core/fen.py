@@ -0,0 +1,68 @@
+"""
+Bulk FEN/EPD helpers for streaming position files into and out of Board
+objects without going through python-chess.
+
+    for board in read_fens('positions.epd'):
+        ...
+"""
+
+from src.core.board import Board
+
+
+def parse_position_line(line):
+    """
+    Returns the FEN part of a FEN or EPD line, or None for blank lines and
+    '#' comments. EPD operations after the first four fields are dropped.
+    """
+    line = line.split(';', 1)[0].strip()
+    if not line or line.startswith('#'):
+        return None
+    fields = line.split()
+    if len(fields) >= 6 and fields[4].isdigit() and fields[5].isdigit():
+        return ' '.join(fields[:6])
+    return ' '.join(fields[:4])
+
+
+def decode_fens(lines, board=None):
+    """
+    Yields a board set to each position in lines. The same Board object is
+    reused for every position, so copy() it if it has to outlive the next
+    iteration.
+    """
+    for line in lines:
+        fen = parse_position_line(line)
+        if fen is None:
+            continue
+        if board is None:
+            board = Board.from_fen(fen)
+        else:
+            board.set_fen(fen)
+        yield board
+
+
+def encode_fens(boards):
+    """
+    Yields the FEN string of every board.
+    """
+    for board in boards:
+        yield board.to_fen()
+
+
+def read_fens(path, board=None):
+    """
+    Streams the positions of a FEN or EPD file, one per line.
+    """
+    with open(path, 'r') as f:
+        yield from decode_fens(f, board)
+
+
+def write_fens(path, boards):
+    """
+    Writes one FEN per line and returns the number of positions written.
+    """
+    count = 0
+    with open(path, 'w') as f:
+        for fen in encode_fens(boards):
+            f.write(fen + '\n')
+            count += 1
+    return count
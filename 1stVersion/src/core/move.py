@@ -0,0 +1,176 @@
+from src.utils.utils import algebraic_to_square, square_to_algebraic
+
+PIECE_SYMBOLS = 'PNBRQKpnbrqk'
+PIECE_CODES = {piece: index for index, piece in enumerate(PIECE_SYMBOLS)}
+
+# Packed move layout:
+#   bits  0-5   from square
+#   bits  6-11  to square
+#   bits 12-15  moving piece (index into PIECE_SYMBOLS)
+#   bits 16-19  captured piece + 1 (0 = no capture)
+#   bits 20-23  promotion piece + 1 (0 = no promotion)
+#   bit  24     en passant
+#   bit  25     castling
+TO_SHIFT = 6
+PIECE_SHIFT = 12
+CAPTURE_SHIFT = 16
+PROMOTION_SHIFT = 20
+
+SQUARE_MASK = 0x3F
+PIECE_MASK = 0xF
+CAPTURE_MASK = 0xF << CAPTURE_SHIFT
+PROMOTION_MASK = 0xF << PROMOTION_SHIFT
+EN_PASSANT_FLAG = 1 << 24
+CASTLING_FLAG = 1 << 25
+
+# Capture bits for a mailbox entry, e.g. CAPTURE_CODES[board.mailbox[to_square]]
+CAPTURE_CODES = {None: 0}
+CAPTURE_CODES.update({piece: (index + 1) << CAPTURE_SHIFT for piece, index in PIECE_CODES.items()})
+PROMOTION_CODES = {piece: (index + 1) << PROMOTION_SHIFT for piece, index in PIECE_CODES.items()}
+
+
+def encode_move(piece, from_square, to_square, captured_piece=None, promoted_piece=None,
+                is_en_passant=False, is_castling=False):
+    """
+    Packs a move into a single integer. The promotion piece takes the colour
+    of the moving piece, whatever case it was given in.
+    """
+    code = from_square | (to_square << TO_SHIFT) | (PIECE_CODES[piece] << PIECE_SHIFT)
+    if captured_piece:
+        code |= CAPTURE_CODES[captured_piece]
+    if promoted_piece:
+        promoted_piece = promoted_piece.upper() if piece.isupper() else promoted_piece.lower()
+        code |= PROMOTION_CODES[promoted_piece]
+    if is_en_passant:
+        code |= EN_PASSANT_FLAG
+    if is_castling:
+        code |= CASTLING_FLAG
+    return code
+
+
+def move_from_square(move):
+    return move & SQUARE_MASK
+
+
+def move_to_square(move):
+    return (move >> TO_SHIFT) & SQUARE_MASK
+
+
+def move_piece(move):
+    return PIECE_SYMBOLS[(move >> PIECE_SHIFT) & PIECE_MASK]
+
+
+def move_captured_piece(move):
+    captured = (move >> CAPTURE_SHIFT) & PIECE_MASK
+    return PIECE_SYMBOLS[captured - 1] if captured else None
+
+
+def move_promoted_piece(move):
+    promoted = (move >> PROMOTION_SHIFT) & PIECE_MASK
+    return PIECE_SYMBOLS[promoted - 1] if promoted else None
+
+
+def move_to_uci(move):
+    uci = square_to_algebraic(move & SQUARE_MASK) + square_to_algebraic((move >> TO_SHIFT) & SQUARE_MASK)
+    promoted = (move >> PROMOTION_SHIFT) & PIECE_MASK
+    if promoted:
+        uci += PIECE_SYMBOLS[promoted - 1].lower()
+    return uci
+
+
+class Move(int):
+    """
+    Read-only view over a packed move integer. A Move is the integer itself,
+    so it compares and hashes equal to its code, can be stored in array('I')
+    buffers and passed anywhere the engine expects a packed move.
+    """
+    __slots__ = ()
+
+    def __new__(
+        cls,
+        piece,
+        from_square,
+        to_square,
+        captured_piece=None,
+        promoted_piece=None,
+        is_en_passant=False,
+        is_castling=False,
+    ):
+        return int.__new__(cls, encode_move(
+            piece, from_square, to_square, captured_piece, promoted_piece, is_en_passant, is_castling))
+
+    @classmethod
+    def from_code(cls, code):
+        return int.__new__(cls, code)
+
+    @classmethod
+    def from_uci(cls, board, uci_move):
+        """
+        Builds a Move for the given board from a UCI string such as 'e7e8q'.
+        """
+        from_square = algebraic_to_square(uci_move[:2])
+        to_square = algebraic_to_square(uci_move[2:4])
+        if from_square is None or to_square is None:
+            return None
+        piece = board.mailbox[from_square]
+        if piece is None:
+            return None
+        captured_piece = board.mailbox[to_square]
+        is_en_passant = piece in 'Pp' and to_square == board.en_passant_target
+        if is_en_passant:
+            captured_piece = 'p' if piece.isupper() else 'P'
+        return cls(
+            piece,
+            from_square,
+            to_square,
+            captured_piece=captured_piece,
+            promoted_piece=uci_move[4] if len(uci_move) > 4 else None,
+            is_en_passant=is_en_passant,
+            is_castling=piece in 'Kk' and abs(to_square - from_square) == 2,
+        )
+
+    @property
+    def code(self):
+        return int(self)
+
+    @property
+    def from_square(self):
+        return self & SQUARE_MASK
+
+    @property
+    def to_square(self):
+        return (self >> TO_SHIFT) & SQUARE_MASK
+
+    @property
+    def piece(self):
+        return move_piece(self)
+
+    @property
+    def captured_piece(self):
+        return move_captured_piece(self)
+
+    @property
+    def promoted_piece(self):
+        return move_promoted_piece(self)
+
+    @property
+    def is_en_passant(self):
+        return bool(self & EN_PASSANT_FLAG)
+
+    @property
+    def is_castling(self):
+        return bool(self & CASTLING_FLAG)
+
+    def uci(self):
+        return move_to_uci(self)
+
+    def __repr__(self):
+        move_str = f"{square_to_algebraic(self.from_square)}{square_to_algebraic(self.to_square)}"
+        if self.promoted_piece:
+            move_str += f"={self.promoted_piece}"
+        if self.is_castling:
+            if self.to_square in [6, 62]:
+                move_str = "O-O"
+            elif self.to_square in [2, 58]:
+                move_str = "O-O-O"
+        return move_str
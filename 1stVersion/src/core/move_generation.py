@@ -1,8 +1,5 @@
-from src.core.constants import KNIGHT_MOVES, KING_MOVES , FILE_A , FILE_H
-from collections import namedtuple
-from src.core.board import Move
-
-Move = namedtuple('Move', ['piece', 'from_square', 'to_square', 'promotion'])
+from src.core.constants import KNIGHT_MOVES, KING_MOVES , FILE_A , FILE_H, rook_attacks, bishop_attacks, queen_attacks
+from src.core.move import Move
 
 def generate_legal_moves(board):
     moves = []
@@ -47,7 +44,7 @@ def generate_all_pawn_moves(board, own_pieces, enemy_pieces, is_white):
     while single_moves:
         to_square = (single_moves & -single_moves).bit_length() - 1
         from_square = to_square - direction
-        moves.append(Move(pawn_piece, from_square, to_square, None))
+        moves.append(Move(pawn_piece, from_square, to_square))
         single_moves &= single_moves - 1
 
     # Add promotions
@@ -56,7 +53,7 @@ def generate_all_pawn_moves(board, own_pieces, enemy_pieces, is_white):
         from_square = to_square - direction
         for promotion_piece in ['Q', 'R', 'B', 'N']:
             prom_piece = promotion_piece if is_white else promotion_piece.lower()
-            moves.append(Move(pawn_piece, from_square, to_square, prom_piece))
+            moves.append(Move(pawn_piece, from_square, to_square, promoted_piece=prom_piece))
         promotion_moves &= promotion_moves - 1
 
     # Double moves
@@ -68,7 +65,7 @@ def generate_all_pawn_moves(board, own_pieces, enemy_pieces, is_white):
     while double_moves:
         to_square = (double_moves & -double_moves).bit_length() - 1
         from_square = to_square - 2 * direction
-        moves.append(Move(pawn_piece, from_square, to_square, None))
+        moves.append(Move(pawn_piece, from_square, to_square))
         double_moves &= double_moves - 1
 
     # Captures
@@ -86,7 +83,7 @@ def generate_all_pawn_moves(board, own_pieces, enemy_pieces, is_white):
     while capture_moves:
         to_square = (capture_moves & -capture_moves).bit_length() - 1
         from_square = to_square - (direction - 1) if (left_captures & (1 << to_square)) else to_square - (direction + 1)
-        moves.append(Move(pawn_piece, from_square, to_square, None))
+        moves.append(Move(pawn_piece, from_square, to_square, captured_piece=board.mailbox[to_square]))
         capture_moves &= capture_moves - 1
 
     while promotion_captures:
@@ -94,7 +91,8 @@ def generate_all_pawn_moves(board, own_pieces, enemy_pieces, is_white):
         from_square = to_square - (direction - 1) if (left_captures & (1 << to_square)) else to_square - (direction + 1)
         for promotion_piece in ['Q', 'R', 'B', 'N']:
             prom_piece = promotion_piece if is_white else promotion_piece.lower()
-            moves.append(Move(pawn_piece, from_square, to_square, prom_piece))
+            moves.append(Move(pawn_piece, from_square, to_square, captured_piece=board.mailbox[to_square],
+                              promoted_piece=prom_piece))
         promotion_captures &= promotion_captures - 1
 
     # En passant captures
@@ -106,7 +104,8 @@ def generate_all_pawn_moves(board, own_pieces, enemy_pieces, is_white):
             ep_pawns = pawn_bitboard & ((1 << (ep_square + 7)) | (1 << (ep_square + 9)))
         while ep_pawns:
             from_square = (ep_pawns & -ep_pawns).bit_length() - 1
-            moves.append(Move(pawn_piece, from_square, ep_square, None))
+            moves.append(Move(pawn_piece, from_square, ep_square, captured_piece='p' if is_white else 'P',
+                              is_en_passant=True))
             ep_pawns &= ep_pawns - 1
 
     return moves
@@ -123,7 +122,7 @@ def generate_all_knight_moves(board, own_pieces, is_white):
         knight_attacks = KNIGHT_MOVES[from_square] & ~own_pieces
         while knight_attacks:
             to_square = (knight_attacks & -knight_attacks).bit_length() - 1
-            moves.append(Move(knight_piece, from_square, to_square, None))
+            moves.append(Move(knight_piece, from_square, to_square, captured_piece=board.mailbox[to_square]))
             knight_attacks &= knight_attacks - 1
         knight_bitboard &= knight_bitboard - 1
     return moves
@@ -137,7 +136,7 @@ def generate_all_bishop_moves(board, own_pieces, is_white):
         attacks = generate_sliding_attacks(from_square, board.occupied, 'bishop') & ~own_pieces
         while attacks:
             to_square = (attacks & -attacks).bit_length() - 1
-            moves.append(Move(bishop_piece, from_square, to_square, None))
+            moves.append(Move(bishop_piece, from_square, to_square, captured_piece=board.mailbox[to_square]))
             attacks &= attacks - 1
         bishop_bitboard &= bishop_bitboard - 1
     return moves
@@ -151,7 +150,7 @@ def generate_all_rook_moves(board, own_pieces, is_white):
         attacks = generate_sliding_attacks(from_square, board.occupied, 'rook') & ~own_pieces
         while attacks:
             to_square = (attacks & -attacks).bit_length() - 1
-            moves.append(Move(rook_piece, from_square, to_square, None))
+            moves.append(Move(rook_piece, from_square, to_square, captured_piece=board.mailbox[to_square]))
             attacks &= attacks - 1
         rook_bitboard &= rook_bitboard - 1
     return moves
@@ -165,7 +164,7 @@ def generate_all_queen_moves(board, own_pieces, is_white):
         attacks = generate_sliding_attacks(from_square, board.occupied, 'queen') & ~own_pieces
         while attacks:
             to_square = (attacks & -attacks).bit_length() - 1
-            moves.append(Move(queen_piece, from_square, to_square, None))
+            moves.append(Move(queen_piece, from_square, to_square, captured_piece=board.mailbox[to_square]))
             attacks &= attacks - 1
         queen_bitboard &= queen_bitboard - 1
     return moves
@@ -174,13 +173,13 @@ def generate_all_king_moves(board, own_pieces, is_white):
     moves = []
     king_piece = 'K' if is_white else 'k'
     king_bitboard = board.bitboards.get(king_piece, 0)
-    enemy_attacks = board.get_all_enemy_attacks(not is_white)
+    enemy_attacks = get_all_enemy_attacks(board, not is_white)
     while king_bitboard:
         from_square = (king_bitboard & -king_bitboard).bit_length() - 1
         king_attacks = KING_MOVES[from_square] & ~own_pieces & ~enemy_attacks
         while king_attacks:
             to_square = (king_attacks & -king_attacks).bit_length() - 1
-            moves.append(Move(king_piece, from_square, to_square))
+            moves.append(Move(king_piece, from_square, to_square, captured_piece=board.mailbox[to_square]))
             king_attacks &= king_attacks - 1
         king_bitboard &= king_bitboard - 1
 
@@ -199,65 +198,18 @@ def generate_all_king_moves(board, own_pieces, is_white):
 
 
 def get_all_enemy_attacks(self, by_white):
-    attacks = 0
-    enemy_pieces = 'PNBRQK' if by_white else 'pnbrqk'
-    for piece in enemy_pieces:
-        bitboard = self.bitboards.get(piece, 0)
-        while bitboard:
-            from_square = (bitboard & -bitboard).bit_length() - 1
-            piece_attacks = self.generate_piece_moves(piece, from_square, attacks_only=True)
-            for move in piece_attacks:
-                attacks |= (1 << move.to_square)
-            bitboard &= bitboard - 1
-    return attacks
+    return self.get_attack_map(by_white)
 
 
 def generate_sliding_attacks(square, occupied, piece_type):
-    attacks = 0
-    for direction in SLIDING_DIRECTIONS[piece_type]:
-        sq = square
-        while True:
-            sq = SQUARES[sq]['neighbors'].get(direction)
-            if sq is None:
-                break
-            attacks |= 1 << sq
-            if occupied & (1 << sq):
-                break
-    return attacks
+    return SLIDING_ATTACKS[piece_type](square, occupied)
 
-SQUARES = [{'neighbors': {}} for _ in range(64)]
-DIRECTIONS = ['N', 'S', 'E', 'W', 'NE', 'NW', 'SE', 'SW']
-SLIDING_DIRECTIONS = {
-    'rook': ['N', 'S', 'E', 'W'],
-    'bishop': ['NE', 'NW', 'SE', 'SW'],
-    'queen': DIRECTIONS
+SLIDING_ATTACKS = {
+    'rook': rook_attacks,
+    'bishop': bishop_attacks,
+    'queen': queen_attacks
 }
 
-def initialize_squares():
-    for square in range(64):
-        rank = square // 8
-        file = square % 8
-        neighbors = {}
-        if rank < 7:
-            neighbors['N'] = square + 8
-        if rank > 0:
-            neighbors['S'] = square - 8
-        if file < 7:
-            neighbors['E'] = square + 1
-        if file > 0:
-            neighbors['W'] = square - 1
-        if rank < 7 and file < 7:
-            neighbors['NE'] = square + 9
-        if rank < 7 and file > 0:
-            neighbors['NW'] = square + 7
-        if rank > 0 and file < 7:
-            neighbors['SE'] = square - 7
-        if rank > 0 and file > 0:
-            neighbors['SW'] = square - 9
-        SQUARES[square]['neighbors'] = neighbors
-
-initialize_squares()
-
 KNIGHT_MOVES = [0] * 64
 KING_MOVES = [0] * 64
 
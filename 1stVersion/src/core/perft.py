@@ -0,0 +1,163 @@
+"""
+Perft: counts the leaf nodes of the legal move tree to a fixed depth, to
+validate move generation against known node counts and to measure raw
+make/undo and generation throughput.
+
+    python -m src.core.perft --depth 4
+    python -m src.core.perft --fen "<fen>" --depth 3 --divide
+    python -m src.core.perft --suite --max-depth 4 --processes 8
+"""
+
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from src.core.board import Board
+from src.core.move import move_to_uci
+
+START_FEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+
+# (name, fen, {depth: expected nodes})
+PERFT_SUITE = [
+    ('startpos', START_FEN,
+     {1: 20, 2: 400, 3: 8902, 4: 197281, 5: 4865609}),
+    ('kiwipete', 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+     {1: 48, 2: 2039, 3: 97862, 4: 4085603}),
+    ('position3', '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+     {1: 14, 2: 191, 3: 2812, 4: 43238, 5: 674624}),
+    ('position4', 'r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1',
+     {1: 6, 2: 264, 3: 9467, 4: 422333}),
+    ('position5', 'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8',
+     {1: 44, 2: 1486, 3: 62379, 4: 2103487}),
+    ('position6', 'r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10',
+     {1: 46, 2: 2079, 3: 89890, 4: 3894594}),
+]
+
+
+def perft(board, depth, cache=None):
+    """
+    Counts leaf nodes at the given depth. At depth 1 the legal move count
+    is returned directly (bulk counting). If a dict is passed as cache,
+    subtree counts are memoised by (zobrist_hash, depth).
+    """
+    if depth == 0:
+        return 1
+    moves = board.generate_legal_moves()
+    if depth == 1:
+        return len(moves)
+
+    if cache is not None:
+        key = (board.zobrist_hash, depth)
+        nodes = cache.get(key)
+        if nodes is not None:
+            return nodes
+
+    nodes = 0
+    for move in moves:
+        board.make_move(move)
+        nodes += perft(board, depth - 1, cache)
+        board.undo_move(move)
+
+    if cache is not None:
+        cache[key] = nodes
+    return nodes
+
+
+def divide(board, depth, cache=None):
+    """
+    Returns {uci move: leaf count} for every root move.
+    """
+    results = {}
+    for move in board.generate_legal_moves():
+        board.make_move(move)
+        results[move_to_uci(move)] = perft(board, depth - 1, cache)
+        board.undo_move(move)
+    return results
+
+
+def _perft_root_move(fen, move, depth, use_cache):
+    board = Board.from_fen(fen)
+    board.make_move(move)
+    return move_to_uci(move), perft(board, depth - 1, {} if use_cache else None)
+
+
+def parallel_divide(fen, depth, processes=None, use_cache=False):
+    """
+    Like divide(), but splits the root moves across a process pool. Each
+    worker rebuilds the position from the FEN.
+    """
+    board = Board.from_fen(fen)
+    moves = list(board.generate_legal_moves())
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = [executor.submit(_perft_root_move, fen, move, depth, use_cache) for move in moves]
+        return dict(future.result() for future in futures)
+
+
+def run_perft(fen, depth, divide_output=False, use_cache=False, processes=1):
+    """
+    Runs one perft and prints the node count and nodes per second.
+    Returns the node count.
+    """
+    start = time.perf_counter()
+    if processes > 1 and depth > 1:
+        results = parallel_divide(fen, depth, processes, use_cache)
+    elif divide_output:
+        board = Board.from_fen(fen)
+        results = divide(board, depth, {} if use_cache else None)
+    else:
+        board = Board.from_fen(fen)
+        results = {None: perft(board, depth, {} if use_cache else None)}
+    elapsed = time.perf_counter() - start
+
+    if divide_output:
+        for uci_move in sorted(results):
+            print(f"{uci_move}: {results[uci_move]}")
+    nodes = sum(results.values())
+    nps = nodes / elapsed if elapsed > 0 else 0
+    print(f"Depth {depth}: {nodes} nodes in {elapsed:.3f}s ({nps:,.0f} nodes/s)")
+    return nodes
+
+
+def run_suite(max_depth=3, use_cache=False, processes=1):
+    """
+    Runs the reference positions up to max_depth and checks every count.
+    Returns True if all counts match.
+    """
+    all_passed = True
+    total_nodes = 0
+    start = time.perf_counter()
+    for name, fen, expected_counts in PERFT_SUITE:
+        for depth, expected in sorted(expected_counts.items()):
+            if depth > max_depth:
+                break
+            print(f"{name} ", end='')
+            nodes = run_perft(fen, depth, use_cache=use_cache, processes=processes)
+            total_nodes += nodes
+            if nodes != expected:
+                all_passed = False
+                print(f"  FAILED: expected {expected}, got {nodes}")
+    elapsed = time.perf_counter() - start
+    print(f"Suite {'passed' if all_passed else 'FAILED'}: {total_nodes} nodes in {elapsed:.3f}s "
+          f"({total_nodes / elapsed:,.0f} nodes/s)")
+    return all_passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Move generation perft')
+    parser.add_argument('--fen', default=START_FEN)
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--divide', action='store_true', help='print the node count of every root move')
+    parser.add_argument('--cache', action='store_true', help='memoise subtree counts by zobrist hash and depth')
+    parser.add_argument('--processes', type=int, default=1, help='split root moves across this many processes')
+    parser.add_argument('--suite', action='store_true', help='run the reference position suite')
+    parser.add_argument('--max-depth', type=int, default=3, help='deepest suite depth to run')
+    args = parser.parse_args()
+
+    if args.suite:
+        passed = run_suite(args.max_depth, args.cache, args.processes)
+        raise SystemExit(0 if passed else 1)
+    run_perft(args.fen, args.depth, args.divide, args.cache, args.processes)
+
+
+if __name__ == '__main__':
+    main()
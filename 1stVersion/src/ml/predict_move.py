@@ -3,10 +3,15 @@
 import torch
 import numpy as np
 import json
-import chess
 from src.utils.utils import algebraic_to_square, square_to_algebraic
+from src.core.move import move_to_uci
 from src.ml.train_model import ChessMovePredictor
 
+PIECE_TO_INDEX = {
+    'P': 0, 'N': 1, 'B': 2, 'R': 3, 'Q': 4, 'K': 5,
+    'p': 6, 'n': 7, 'b': 8, 'r': 9, 'q': 10, 'k': 11
+}
+
 class MovePredictor:
     def __init__(self, model_path='models/best_move_model.pth', labels_path='models/labels_mapping.json'):
         with open(labels_path, 'r') as f:
@@ -24,23 +29,39 @@ class MovePredictor:
         self.model.eval()
 
     def fen_to_features(self, fen):
-        board = chess.Board(fen)
+        """
+        Encodes a FEN string by reading its placement and side fields
+        directly, in the same layout as board_to_features.
+        """
+        placement, active_color = fen.split()[:2]
         feature = np.zeros((8, 8, 13), dtype=np.float32)
-        piece_to_index = {
-            'P': 0, 'N': 1, 'B': 2, 'R': 3, 'Q': 4, 'K': 5,
-            'p': 6, 'n': 7, 'b': 8, 'r': 9, 'q': 10, 'k': 11
-        }
-        for square, piece in board.piece_map().items():
-            row = 7 - (square // 8)
-            col = square % 8
-            piece_idx = piece_to_index[piece.symbol()]
-            feature[row, col, piece_idx] = 1
-        active_color = 1 if board.turn == chess.WHITE else 0
-        feature[:, :, 12] = active_color
+        for row, rank in enumerate(placement.split('/')):
+            col = 0
+            for char in rank:
+                if char.isdigit():
+                    col += int(char)
+                else:
+                    feature[row, col, PIECE_TO_INDEX[char]] = 1
+                    col += 1
+        feature[:, :, 12] = 1 if active_color == 'w' else 0
         return feature.flatten()
 
-    def predict_move(self, fen, legal_moves):
-        features = self.fen_to_features(fen)
+    def board_to_features(self, board):
+        feature = np.zeros((8, 8, 13), dtype=np.float32)
+        for square, piece in enumerate(board.mailbox):
+            if piece:
+                feature[7 - (square // 8), square % 8, PIECE_TO_INDEX[piece]] = 1
+        feature[:, :, 12] = 1 if board.white_to_move else 0
+        return feature.flatten()
+
+    def predict_move(self, position, legal_moves):
+        """
+        position is either a FEN string or a Board.
+        """
+        if isinstance(position, str):
+            features = self.fen_to_features(position)
+        else:
+            features = self.board_to_features(position)
         features = torch.tensor(features, dtype=torch.float32).unsqueeze(0).to(self.device)
 
         with torch.no_grad():
@@ -56,14 +77,14 @@ class MovePredictor:
 
     def is_move_legal(self, move_str, legal_moves):
         for move in legal_moves:
-            if str(move) == move_str:
+            if move_to_uci(move) == move_str:
                 return True
         return False
 
     def update_model(self, fen, move):
         features = self.fen_to_features(fen)
         features = torch.tensor(features, dtype=torch.float32).unsqueeze(0).to(self.device)
-        move_idx = self.move_to_int.get(str(move), None)
+        move_idx = self.move_to_int.get(move_to_uci(move), None)
         
         if move_idx is not None:
             target = torch.tensor([move_idx], dtype=torch.long).to(self.device)
@@ -58,8 +58,7 @@ class RLAgent:
             'P': 0, 'N': 1, 'B': 2, 'R': 3, 'Q': 4, 'K': 5,
             'p': 6, 'n': 7, 'b': 8, 'r': 9, 'q': 10, 'k': 11
         }
-        for square in range(64):
-            piece = board.get_piece_at_square(square)
+        for square, piece in enumerate(board.mailbox):
             if piece:
                 row = 7 - (square // 8)
                 col = square % 8
@@ -185,7 +184,7 @@ class RLAgent:
                     pygame.display.flip()
                     pygame.event.pump()  # Process event queue
 
-                legal_moves = board.generate_legal_moves()
+                legal_moves = board.legal_moves()
                 if not legal_moves:
                     # Game over
                     done = True